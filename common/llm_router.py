@@ -0,0 +1,255 @@
+"""
+Shared llama.cpp client routing for all three apps
+
+- LLMRouter spreads requests over a pool of llama.cpp servers, sending each to
+  the endpoint with the fewest requests in flight
+- Background /health checks take unhealthy servers out of rotation; a server's
+  health is unknown (None) until its first probe
+- A per-endpoint circuit breaker stops sending to a server after repeated
+  failures and lets a single trial request through once it has cooled down
+- Connection errors, timeouts and 5xx responses fail over to the next endpoint
+
+Endpoints come from the LLAMA_SERVER_URLS environment variable (comma-separated
+base URLs, e.g. "http://10.0.0.5:8080,http://10.0.0.6:8080") unless passed
+explicitly.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_SERVER_URL = "http://localhost:8080"
+
+
+class NoAvailableEndpointError(requests.ConnectionError):
+    """Every endpoint is down, circuit-broken or failed this request"""
+
+
+def endpoints_from_env(default: str = DEFAULT_SERVER_URL, variable: str = "LLAMA_SERVER_URLS") -> List[str]:
+    """Base URLs from ``variable``, or ``default`` (which may itself be a list)"""
+    value = os.environ.get(variable) or default
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class Endpoint:
+    """One llama.cpp server and its routing state"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.healthy: Optional[bool] = None  # unknown until the first /health probe
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.avg_latency = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.avg_latency * 1000, 1)
+        }
+
+
+class LLMRouter:
+    """Least-outstanding-requests router with health checks, circuit breaking and failover"""
+
+    def __init__(self, endpoints: Optional[List[str]] = None, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0, health_interval: float = 10.0,
+                 session: Optional[requests.Session] = None, pool_maxsize: int = 10):
+        urls = endpoints or endpoints_from_env()
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.health_interval = health_interval
+        self.session = session or self._create_session(pool_maxsize)
+
+        self._lock = threading.Lock()
+        self._affinity: Dict[str, Endpoint] = {}
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _create_session(pool_maxsize: int) -> requests.Session:
+        # No transport-level retries: failover to another endpoint replaces them
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def primary_url(self) -> str:
+        return self.endpoints[0].url
+
+    # -- endpoint selection ---------------------------------------------------
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == Endpoint.CLOSED:
+            return True
+        if endpoint.state == Endpoint.OPEN:
+            return now - endpoint.opened_at >= self.reset_timeout
+        return endpoint.outstanding == 0  # half-open: one trial request at a time
+
+    def _pick(self, exclude: set, affinity: Optional[str]) -> Optional[Endpoint]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e.url not in exclude and self._available(e, now)]
+            # Servers not probed yet are tried when none is known healthy, and
+            # unhealthy ones only when nothing else is left
+            candidates = ([e for e in candidates if e.healthy] or [e for e in candidates if e.healthy is None]
+                          or candidates)
+            if not candidates:
+                return None
+
+            least = min(e.outstanding for e in candidates)
+            tied = [e for e in candidates if e.outstanding == least]
+            preferred = self._affinity.get(affinity) if affinity else None
+            endpoint = preferred if preferred in tied else min(tied, key=lambda e: e.avg_latency)
+
+            if endpoint.state == Endpoint.OPEN:
+                endpoint.state = Endpoint.HALF_OPEN  # this request is the trial
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            if affinity:
+                self._affinity[affinity] = endpoint
+            return endpoint
+
+    def _record(self, endpoint: Endpoint, ok: bool, latency: float):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.state = Endpoint.CLOSED
+                endpoint.avg_latency = latency if not endpoint.avg_latency else (
+                    0.8 * endpoint.avg_latency + 0.2 * latency
+                )
+                return
+
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.state == Endpoint.HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+                if endpoint.state != Endpoint.OPEN:
+                    logger.warning(f"⚡ Circuit opened for {endpoint.url} after "
+                                   f"{endpoint.consecutive_failures} consecutive failures")
+                endpoint.state = Endpoint.OPEN
+                endpoint.opened_at = time.monotonic()
+
+    def available(self) -> bool:
+        """Some endpoint can take a request: not known to be unhealthy and its
+        circuit not open (or due for a trial request)"""
+        with self._lock:
+            now = time.monotonic()
+            return any(endpoint.healthy is not False and self._available(endpoint, now)
+                       for endpoint in self.endpoints)
+
+    # -- requests -------------------------------------------------------------
+
+    @staticmethod
+    def _is_endpoint_failure(error: Exception) -> bool:
+        """Errors that say the server (not the request) is at fault"""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(error, "response", None)
+        return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
+
+    def call(self, func: Callable[[str], T], affinity: Optional[str] = None) -> T:
+        """Run ``func(base_url)`` on the best endpoint, failing over on server errors.
+
+        ``func`` should raise (e.g. via ``raise_for_status``) on failure. Endpoint
+        failures move on to the next endpoint; any other exception propagates.
+        ``affinity`` keeps requests with the same key on the same endpoint when
+        it is not busier than the alternatives.
+        """
+        tried: set = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._pick(tried, affinity)
+            if endpoint is None:
+                raise NoAvailableEndpointError(
+                    f"No available LLM endpoint ({len(tried)} tried): {last_error}"
+                )
+
+            start = time.monotonic()
+            try:
+                result = func(endpoint.url)
+            except Exception as e:
+                failed = self._is_endpoint_failure(e)
+                self._record(endpoint, ok=not failed, latency=time.monotonic() - start)
+                if not failed:
+                    raise
+                logger.warning(f"⚠️ LLM endpoint {endpoint.url} failed, failing over: {e}")
+                tried.add(endpoint.url)
+                last_error = e
+                continue
+
+            self._record(endpoint, ok=True, latency=time.monotonic() - start)
+            return result
+
+    def request(self, method: str, path: str, affinity: Optional[str] = None, **kwargs) -> requests.Response:
+        """Send one HTTP request through the router; 5xx responses fail over"""
+        def send(base_url: str) -> requests.Response:
+            response = self.session.request(method, f"{base_url}{path}", **kwargs)
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        return self.call(send, affinity)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    # -- health checks --------------------------------------------------------
+
+    def check_health(self, timeout: float = 5.0) -> Dict[str, bool]:
+        """Probe every endpoint's /health once; returns url -> healthy"""
+        results = {}
+        for endpoint in self.endpoints:
+            try:
+                healthy = self.session.get(f"{endpoint.url}/health", timeout=timeout).status_code == 200
+            except requests.RequestException:
+                healthy = False
+            if healthy != endpoint.healthy:
+                logger.info(f"{'✅' if healthy else '❌'} LLM endpoint {endpoint.url} is "
+                            f"{'healthy' if healthy else 'unhealthy'}")
+            endpoint.healthy = healthy
+            results[endpoint.url] = healthy
+        return results
+
+    def start_health_checks(self):
+        """Probe /health every ``health_interval`` seconds on a daemon thread"""
+        if self._health_thread is not None or self.health_interval <= 0:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name="llm-health", daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
@@ -0,0 +1,113 @@
+"""
+Grammar-constrained structured output from llama.cpp, shared by the apps
+
+- schema_for() turns a Pydantic model into the JSON schema sent as llama.cpp's
+  ``json_schema`` request field; the server compiles it to a GBNF grammar and
+  only samples tokens that keep the output valid, so the object always parses
+- max_output_tokens() bounds the tokens any conforming object can take, which
+  caps ``n_predict``: generation ends when the object closes instead of running
+  to a generic limit
+- parse_structured() validates a completion with pydantic-core's JSON parser
+"""
+
+import functools
+import math
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Conservative characters per token inside generated strings (English prose
+# averages ~4; digits and punctuation tokenize worse)
+STRING_CHARS_PER_TOKEN = 2.5
+# llama.cpp's JSON grammar caps numbers at 16 integer and 16 fraction digits
+INTEGER_TOKENS = 6
+NUMBER_TOKENS = 12
+
+
+class StructuredOutputError(ValueError):
+    """The completion did not validate against the requested model"""
+
+    def __init__(self, message: str, text: str):
+        super().__init__(message)
+        self.text = text
+
+
+@functools.lru_cache(maxsize=None)
+def schema_for(model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema for ``model`` (cached; copy it before narrowing)"""
+    return model.model_json_schema()
+
+
+def _text_tokens(text: str) -> int:
+    return math.ceil(len(text) / STRING_CHARS_PER_TOKEN) + 1
+
+
+def max_output_tokens(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Upper bound on the tokens of any JSON value matching ``schema``.
+
+    None when the schema is unbounded (a string without ``maxLength``, an
+    array without ``maxItems``).
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return max_output_tokens(defs[schema["$ref"].rsplit("/", 1)[1]], defs)
+    if "enum" in schema or "const" in schema:
+        values = schema.get("enum", [schema.get("const")])
+        return max(_text_tokens(repr(value)) for value in values)
+    if "anyOf" in schema or "oneOf" in schema:
+        bounds = [max_output_tokens(option, defs) for option in schema.get("anyOf", schema.get("oneOf"))]
+        return None if None in bounds else max(bounds)
+
+    kind = schema.get("type")
+    if kind == "object":
+        total = 2  # braces
+        for name, prop in schema.get("properties", {}).items():
+            value = max_output_tokens(prop, defs)
+            if value is None:
+                return None
+            total += _text_tokens(f'"{name}": ') + value + 1  # separator
+        return total
+    if kind == "array":
+        if "maxItems" not in schema:
+            return None
+        item = max_output_tokens(schema.get("items", {}), defs)
+        return None if item is None else 2 + schema["maxItems"] * (item + 1)
+    if kind == "string":
+        if "maxLength" not in schema:
+            return None
+        return math.ceil(schema["maxLength"] / STRING_CHARS_PER_TOKEN) + 2  # quotes
+    if kind == "integer":
+        if "minimum" in schema and "maximum" in schema:
+            return max(_text_tokens(str(schema["minimum"])), _text_tokens(str(schema["maximum"])))
+        return INTEGER_TOKENS
+    if kind == "number":
+        return NUMBER_TOKENS
+    if kind in ("boolean", "null"):
+        return 2
+    return None
+
+
+def n_predict_for(schema: Dict[str, Any], max_tokens: Optional[int] = None, default: int = 512) -> int:
+    """``n_predict`` for a structured request: the schema's bound, capped at
+    ``max_tokens``; ``max_tokens`` (or ``default``) when the schema is unbounded"""
+    bound = max_output_tokens(schema)
+    if bound is None:
+        return max_tokens or default
+    return min(bound, max_tokens) if max_tokens else bound
+
+
+def parse_structured(text: str, model: Type[ModelT]) -> Optional[ModelT]:
+    """Validate a JSON completion against ``model``; None if it does not conform.
+
+    Text around the outermost JSON object is ignored, for servers that return
+    the object without enforcing the schema.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        return model.model_validate_json(text[start:end + 1])
+    except ValidationError:
+        return None
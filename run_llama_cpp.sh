@@ -1,11 +1,33 @@
-# Location and name of GGUF model for llama.cpp
+# Location and name of GGUF model for llama.cpp (the large tier, which serves
+# every step unless a small model is configured below)
 MODEL_DIR="/Users/donohara/.lmstudio/models/lmstudio-community/DeepSeek-R1-Distill-Qwen-7B-GGUF"
 MODEL_NAME="DeepSeek-R1-Distill-Qwen-7B-Q3_K_L.gguf"
+PORT=8080
+
+# Optional small tier for classification and per-paper analysis: set SMALL_MODEL
+# to a GGUF path to start a second server on SMALL_PORT, then start ResearchMate
+# with LLAMA_SMALL_SERVER_URLS=http://localhost:$SMALL_PORT
+SMALL_MODEL="${SMALL_MODEL:-}"
+SMALL_PORT=8081
+
+# Concurrent requests per server; --ctx-size is split across the slots, so each
+# gets 4096 tokens (ResearchMate's MAX_CONTEXT_LENGTH). ResearchMate reads the
+# slot count from each server's /props.
+PARALLEL=4
 
 # Location of llama.cpp binary
 LLAMA_CPP="/opt/homebrew/Cellar/llama.cpp/5740/bin/llama-server"
 
+if [ -n "$SMALL_MODEL" ]; then
+    # Small tier runs in the background and is stopped with this script
+    SMALL_CMD="$LLAMA_CPP --model $SMALL_MODEL --port $SMALL_PORT --n-predict 1024 --parallel $PARALLEL --ctx-size $((4096 * PARALLEL)) --threads 32"
+    echo $SMALL_CMD
+    eval $SMALL_CMD &
+    trap "kill $!" EXIT
+    echo "ResearchMate small tier: export LLAMA_SMALL_SERVER_URLS=http://localhost:$SMALL_PORT"
+fi
+
 # Final command to start the llama.cpp server
-CMD="$LLAMA_CPP --model $MODEL_DIR/$MODEL_NAME --n-predict 1024 --ctx_size 4096 --threads 32"
+CMD="$LLAMA_CPP --model $MODEL_DIR/$MODEL_NAME --port $PORT --n-predict 1024 --parallel $PARALLEL --ctx-size $((4096 * PARALLEL)) --threads 32"
 echo $CMD
-eval $CMD%
\ No newline at end of file
+eval $CMD
@@ -15,13 +15,14 @@
 #    uvicorn main:app --reload
 
 import os
+import sys
 import uuid
 import requests
 import json
 import sqlite3
 import logging
 from pathlib import Path
-from typing import Dict, Any, List, Type
+from typing import Annotated, Dict, Any, List, Literal, Optional, Type
 
 from fastapi import FastAPI, BackgroundTasks, HTTPException
 from pydantic import BaseModel, Field
@@ -31,6 +32,12 @@ from crewai import Agent, Task, Crew, Process
 # We no longer need to import tool-related classes from LangChain here
 from langchain.llms.base import LLM
 
+# Shared llama.cpp routing (load balancing + failover across servers) and
+# grammar-constrained structured output
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from llm_router import LLMRouter, endpoints_from_env
+from structured_output import n_predict_for, parse_structured, schema_for
+
 # --- LOGGING SETUP ---
 logging.basicConfig(
     level=logging.INFO,
@@ -43,7 +50,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION & INITIALIZATION ---
-LLAMA_CPP_SERVER_URL = "http://localhost:8080/completion"
+# Comma-separated pool of servers via LLAMA_SERVER_URLS
+LLAMA_CPP_SERVER_URLS = endpoints_from_env("http://localhost:8080")
+llm_router = LLMRouter(LLAMA_CPP_SERVER_URLS)
+llm_router.start_health_checks()
 DB_FILE = "jobs.db"
 fake = Faker()
 
@@ -63,6 +73,7 @@ def init_db():
                                ticker     TEXT NOT NULL,
                                status     TEXT NOT NULL,
                                result     TEXT,
+                               brief      TEXT,
                                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                            )
                            """)
@@ -72,6 +83,16 @@ def init_db():
         except sqlite3.Error as e:
             logger.error(f"Database error during initialization: {e}", exc_info=True)
             raise e
+        return
+
+    # Databases created before the structured brief was added
+    conn = sqlite3.connect(DB_FILE)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+    if "brief" not in columns:
+        logger.info("Adding 'brief' column to jobs table...")
+        conn.execute("ALTER TABLE jobs ADD COLUMN brief TEXT")
+        conn.commit()
+    conn.close()
 
 
 def get_db_connection():
@@ -96,8 +117,8 @@ class LlamaCppLLM(LLM):
         headers = {"Content-Type": "application/json"}
 
         try:
-            logger.debug(f"Sending request to LLM server at {LLAMA_CPP_SERVER_URL}")
-            response = requests.post(LLAMA_CPP_SERVER_URL, headers=headers, json=payload, timeout=300)
+            logger.debug(f"Sending request to LLM servers at {LLAMA_CPP_SERVER_URLS}")
+            response = llm_router.post("/completion", headers=headers, json=payload, timeout=300)
             response.raise_for_status()
             logger.info("LlamaCppLLM: Successfully received response from LLM.")
             return response.json().get("content", "")
@@ -110,12 +131,45 @@ class LlamaCppLLM(LLM):
 
     @property
     def _identifying_params(self) -> Dict[str, Any]:
-        return {"server_url": LLAMA_CPP_SERVER_URL}
+        return {"server_urls": LLAMA_CPP_SERVER_URLS}
 
 
 local_llm = LlamaCppLLM()
 
 
+# --- STRUCTURED BRIEF ---
+# The crew writes free-form Markdown; one grammar-constrained call turns the
+# final brief into JSON that downstream code can use.
+Finding = Annotated[str, Field(max_length=150)]
+
+
+class FinancialBrief(BaseModel):
+    sentiment: Literal["positive", "neutral", "negative"]
+    analyst_rating: Literal["Strong Buy", "Buy", "Hold", "Sell", "Unknown"]
+    key_findings: List[Finding] = Field(max_length=5)
+    risks: List[Finding] = Field(max_length=5)
+    outlook: str = Field(max_length=400)
+
+
+def extract_brief(brief_text: str) -> Optional[FinancialBrief]:
+    """Structured summary of the crew's brief, or None if the LLM call fails"""
+    schema = schema_for(FinancialBrief)
+    prompt = (f"### Instruction:\nSummarize this financial brief as JSON with the overall sentiment, "
+              f"the analyst rating, up to 5 key findings, up to 5 risks and the outlook.\n\n"
+              f"{brief_text}\n\n### Response:")
+    payload = {"prompt": prompt, "n_predict": n_predict_for(schema), "temperature": 0.1, "json_schema": schema}
+    try:
+        response = llm_router.post("/completion", json=payload, timeout=300)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"extract_brief: Error connecting to LLM server: {e}", exc_info=True)
+        return None
+    brief = parse_structured(response.json().get("content", ""), FinancialBrief)
+    if brief is None:
+        logger.warning("extract_brief: LLM output did not match the FinancialBrief schema.")
+    return brief
+
+
 # --- TOOL FUNCTIONS (Plain Python) ---
 
 def web_search_tool_func(query: str) -> str:
@@ -207,7 +261,10 @@ def run_crew_in_background(job_id: str, ticker: str):
         result = financial_crew.kickoff()
         logger.info(f"BACKGROUND_TASK[{job_id}]: Crew kickoff complete.")
 
-        cursor.execute("UPDATE jobs SET status = ?, result = ? WHERE id = ?", ("COMPLETED", result, job_id))
+        logger.info(f"BACKGROUND_TASK[{job_id}]: Extracting structured brief...")
+        brief = extract_brief(str(result))
+        cursor.execute("UPDATE jobs SET status = ?, result = ?, brief = ? WHERE id = ?",
+                       ("COMPLETED", str(result), brief.model_dump_json() if brief else None, job_id))
         logger.info(f"BACKGROUND_TASK[{job_id}]: Job status updated to COMPLETED in DB.")
     except Exception as e:
         logger.error(f"BACKGROUND_TASK[{job_id}]: An error occurred during crew execution.", exc_info=True)
@@ -266,5 +323,7 @@ async def get_result(job_id: str):
             f"API_GET[/research/result]: Attempted to fetch result for incomplete job {job_id}. Status: {job['status']}")
         raise HTTPException(status_code=400, detail=f"Job is not complete. Current status: {job['status']}")
     logger.info(f"API_GET[/research/result]: Successfully retrieved result for job {job_id}.")
-    return dict(job)
+    job = dict(job)
+    job["brief"] = json.loads(job["brief"]) if job.get("brief") else None
+    return job
 
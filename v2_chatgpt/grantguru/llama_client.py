@@ -1,9 +1,18 @@
-import requests
+import sys
+from pathlib import Path
+
+# Shared llama.cpp routing (load balancing + failover across servers)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+from llm_router import LLMRouter, endpoints_from_env
 
 LLAMA_SERVER = "http://localhost:8080"
 
+# Comma-separated pool of servers via LLAMA_SERVER_URLS
+router = LLMRouter(endpoints_from_env(LLAMA_SERVER))
+router.start_health_checks()
+
 def call_llm(prompt: str) -> str:
-    response = requests.post(f"{LLAMA_SERVER}/completion", json={
+    response = router.post("/completion", json={
         "prompt": prompt,
         "max_tokens": 512,
         "stop": ["</s>"]
@@ -1,10 +1,10 @@
 # local_llama_langchain.py
 from langchain.llms.base import LLM
 from typing import Optional, List
-import requests
+from llama_client import router
 
 class LocalLlamaLLM(LLM):
-    endpoint: str = "http://localhost:8080/completion"
+    endpoint: str = "/completion"  # path on each server in the llama_client router pool
     max_tokens: int = 512
     temperature: float = 0.7
     stop: Optional[List[str]] = None
@@ -22,6 +22,6 @@ class LocalLlamaLLM(LLM):
         if self.stop:
             payload["stop"] = self.stop
 
-        response = requests.post(self.endpoint, json=payload)
+        response = router.post(self.endpoint, json=payload)
         response.raise_for_status()
         return response.json()["content"].strip()
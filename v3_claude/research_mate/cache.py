@@ -0,0 +1,367 @@
+"""
+Cache components for ResearchMate
+
+- LRUTTLCache: thread-safe in-memory cache with O(1) LRU eviction,
+  TTL expiry and both entry-count and byte-size budgets
+- PersistentCompletionCache: on-disk SQLite completion cache shared by
+  every worker process
+- PersistentEmbeddingCache: on-disk SQLite store of float32 embeddings
+- SingleFlight: collapses concurrent identical calls into one execution
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from persistence import SQLiteDatabase
+
+_MISSING = object()
+
+
+def default_sizeof(key: Any, value: Any) -> int:
+    """Approximate memory cost of a cache entry in bytes"""
+    def _size(obj: Any) -> int:
+        if isinstance(obj, str):
+            return len(obj.encode("utf-8"))
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return len(obj)
+        return sys.getsizeof(obj)
+
+    return _size(key) + _size(value)
+
+
+class LRUTTLCache:
+    """Thread-safe LRU cache with TTL expiry and entry/byte budgets.
+
+    Entries live in an OrderedDict kept in recency order, so lookups, inserts and
+    LRU evictions are all O(1). Because every entry gets the same TTL, insertion
+    order is also expiry order: a second OrderedDict tracks it so expired entries
+    are swept from the front in amortized O(1) instead of lingering until read.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 sizeof: Callable[[Any, Any], int] = default_sizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._expiry: "OrderedDict[Hashable, float]" = OrderedDict()   # key -> expires_at, oldest first
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Larger than the whole budget - never cacheable
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+            self._entries[key] = (value, expires_at, size)
+            if expires_at is not None:
+                self._expiry[key] = expires_at
+            self._bytes += size
+
+            self._sweep_expired()
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> bool:
+        """Remove ``key`` if present; returns whether it was"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def sweep(self) -> int:
+        """Drop all expired entries; returns how many were removed"""
+        with self._lock:
+            return self._sweep_expired()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sweep_expired()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep_expired()
+            return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._expiry.pop(key, None)
+        self._bytes -= size
+
+    def _sweep_expired(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        while self._expiry:
+            key, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+            removed += 1
+        return removed
+
+
+class PersistentCompletionCache:
+    """On-disk LLM completion cache shared across restarts and worker processes.
+
+    Backed by SQLite in WAL mode (see persistence.SQLiteDatabase) so several
+    uvicorn workers can read while one writes. Keys are the LLM client's cache
+    keys, which already include model identity.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: Optional[float] = None):
+        self.db = SQLiteDatabase(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    content TEXT,
+                    created_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_created ON completions(created_at)")
+
+    def _min_created_at(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def get(self, cache_key: str) -> Optional[str]:
+        row = self.db.query_one(
+            "SELECT content FROM completions WHERE cache_key = ? AND created_at >= ?",
+            (cache_key, self._min_created_at())
+        )
+        if row is None:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with self._stats_lock:
+            self.hits += 1
+        return row[0]
+
+    def set(self, cache_key: str, model: str, content: str):
+        self.db.execute(
+            "INSERT OR REPLACE INTO completions (cache_key, model, content, created_at) VALUES (?, ?, ?, ?)",
+            (cache_key, model, content, time.time())
+        )
+
+    def warm_entries(self, limit: int) -> List[Tuple[str, str]]:
+        """Most recent unexpired (cache_key, content) pairs, oldest first"""
+        rows = self.db.query_all(
+            "SELECT cache_key, content FROM completions WHERE created_at >= ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (self._min_created_at(), limit)
+        )
+        return list(reversed(rows))
+
+    def purge_expired(self) -> int:
+        return self.db.execute("DELETE FROM completions WHERE created_at < ?",
+                               (self._min_created_at(),)).rowcount
+
+    def clear(self):
+        self.db.execute("DELETE FROM completions")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.db.query_one("SELECT COUNT(*) FROM completions")[0]
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class PersistentEmbeddingCache:
+    """On-disk embedding cache keyed by (model, text hash).
+
+    Vectors are stored as raw float32 blobs (4 bytes per dimension, no JSON
+    round-trip) in SQLite WAL mode, so every worker process and restart reuses
+    them. Lookups and inserts take whole batches.
+    """
+
+    # SQLite's default limit on host parameters per statement is 999
+    MAX_VARIABLES = 900
+
+    def __init__(self, db_path: str):
+        self.db = SQLiteDatabase(db_path)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT,
+                    text_hash TEXT,
+                    vector BLOB,
+                    created_at REAL,
+                    PRIMARY KEY (model, text_hash)
+                )
+            """)
+
+    def get_many(self, model: str, text_hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Stored vectors for whichever of ``text_hashes`` are present"""
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(text_hashes), self.MAX_VARIABLES):
+            chunk = text_hashes[start:start + self.MAX_VARIABLES]
+            rows = self.db.query_all(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                f"AND text_hash IN ({', '.join('?' * len(chunk))})",
+                (model, *chunk)
+            )
+            for text_hash, vector in rows:
+                found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(set(text_hashes)) - len(found)
+        return found
+
+    def set_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, created_at) VALUES (?, ?, ?, ?)",
+            [(model, text_hash, np.asarray(vector, dtype=np.float32).tobytes(), now)
+             for text_hash, vector in vectors.items()]
+        )
+
+    def clear(self):
+        self.db.execute("DELETE FROM embeddings")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.db.query_one("SELECT COUNT(*) FROM embeddings")[0]
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight block on the same Future and receive its result (or exception). Caches
+    are only filled once a call completes, so this closes the window in which
+    identical requests would all miss and all hit the backend.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.deduplicated = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": self.in_flight()
+        }
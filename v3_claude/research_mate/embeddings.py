@@ -0,0 +1,254 @@
+"""
+Embedding backends for ResearchMate
+
+- SentenceTransformerBackend: the reference PyTorch fp32 model
+- ONNXBackend: the same model run with ONNX Runtime, optionally with the
+  int8-quantized export (dynamic quantization)
+- CachedEmbeddingBackend: memoizes any backend by (model, text hash) in an
+  in-memory LRU and an on-disk float32 store
+- create_backend(): builds the backend named by Config.EMBEDDING_BACKEND
+
+Every backend returns L2-normalized float32 vectors (a single vector for a
+str, an (n, dim) array for a list), so they are interchangeable behind
+MemoryManager. Backends of the same model agree closely but not exactly;
+bench_embeddings.py measures recall@k parity before switching a deployment.
+
+The ONNX files and tokenizer come from the model's Hugging Face repository
+(sentence-transformers/<model> publishes onnx/model.onnx and quantized
+variants), or from a local directory with the same layout.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from cache import LRUTTLCache, PersistentEmbeddingCache
+
+
+class EmbeddingBackend:
+    """Base class: batching, length-sorting and single-text handling"""
+
+    name = "base"
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = batch_size
+
+    def encode(self, texts: Union[str, Sequence[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """Embed ``texts``; extra keyword arguments are accepted for
+        SentenceTransformer.encode compatibility and ignored"""
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        # Similar lengths share a batch, so little compute goes to padding
+        batch_size = batch_size or self.batch_size
+        order = np.argsort([len(text) for text in texts])
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            embeddings[indices] = self._encode_batch([texts[i] for i in indices])
+        return embeddings[0] if single else embeddings
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """sentence-transformers on PyTorch (fp32) - the reference implementation"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str, threads: Optional[int] = None, batch_size: int = 64):
+        super().__init__(batch_size)
+        import torch  # deferred: importing torch takes seconds
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        return _normalize(np.asarray(embeddings, dtype=np.float32))
+
+
+class ONNXBackend(EmbeddingBackend):
+    """Transformer + mean pooling + normalization on ONNX Runtime.
+
+    ``onnx_file`` picks the export within the model repository, e.g.
+    "onnx/model.onnx" (fp32) or "onnx/model_quint8_avx2.onnx" (int8).
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name: str, onnx_file: str = "onnx/model.onnx", threads: Optional[int] = None,
+                 batch_size: int = 64, max_seq_length: int = 256, name: str = "onnx"):
+        super().__init__(batch_size)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.name = name
+        self.onnx_file = onnx_file
+        self.tokenizer = Tokenizer.from_file(_model_file(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(_model_file(model_name, onnx_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    @property
+    def dimension(self) -> int:
+        if not isinstance(self._dimension, int):  # symbolic in some exports
+            self._dimension = int(self._encode_batch(["dimension probe"]).shape[1])
+        return self._dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask,
+                 "token_type_ids": np.zeros_like(input_ids)}
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        # Mean pooling over real tokens, as in the sentence-transformers pipeline
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _normalize(pooled.astype(np.float32))
+
+
+class CachedEmbeddingBackend(EmbeddingBackend):
+    """Memoizes ``backend`` so a text is encoded once per model.
+
+    Keys are (model, sha1 of the text). Lookups go to the in-memory LRU, then
+    to the on-disk store (if any), and only the remaining distinct texts reach
+    the encoder; their vectors are written to both. Re-ingesting stored papers
+    and repeating a query therefore skip the encoder entirely.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, model_name: str, max_entries: int = 10000,
+                 max_bytes: Optional[int] = None, persistent: Optional[PersistentEmbeddingCache] = None):
+        super().__init__(backend.batch_size)
+        self.backend = backend
+        self.name = backend.name
+        # Backends of the same model differ slightly, so each has its own keys
+        self.model_key = f"{backend.name}:{model_name}"
+        self.memory = LRUTTLCache(max_entries=max_entries, max_bytes=max_bytes,
+                                  sizeof=lambda key, vector: len(key) + vector.nbytes)
+        self.persistent = persistent
+        self.requested = 0
+        self.encoded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def encode(self, texts: Union[str, Sequence[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        hashes = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+
+        vectors: Dict[str, np.ndarray] = {}
+        missing = []
+        for text_hash in dict.fromkeys(hashes):
+            vector = self.memory.get(text_hash)
+            if vector is None:
+                missing.append(text_hash)
+            else:
+                vectors[text_hash] = vector
+        if missing and self.persistent is not None:
+            stored = self.persistent.get_many(self.model_key, missing)
+            for text_hash, vector in stored.items():
+                self.memory.set(text_hash, vector)
+            vectors.update(stored)
+            missing = [text_hash for text_hash in missing if text_hash not in stored]
+
+        if missing:
+            first_text = {}
+            for text_hash, text in zip(hashes, texts):
+                first_text.setdefault(text_hash, text)
+            encoded = self.backend.encode([first_text[text_hash] for text_hash in missing], batch_size=batch_size)
+            # Own copy per row: a view would keep the whole encoded batch alive in the cache
+            new_vectors = {text_hash: vector.copy() for text_hash, vector in zip(missing, encoded)}
+            for text_hash, vector in new_vectors.items():
+                self.memory.set(text_hash, vector)
+            if self.persistent is not None:
+                self.persistent.set_many(self.model_key, new_vectors)
+            vectors.update(new_vectors)
+
+        with self._lock:
+            self.requested += len(texts)
+            self.encoded += len(missing)
+
+        embeddings = np.stack([vectors[text_hash] for text_hash in hashes]) if texts else \
+            np.zeros((0, self.dimension), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requested, encoded = self.requested, self.encoded
+        return {
+            "backend": self.name,
+            "texts": requested,
+            "encoded": encoded,
+            # share of texts served without running the encoder
+            "hit_rate": round(1 - encoded / requested, 3) if requested else 0.0,
+            "memory": self.memory.stats(),
+            "persistent": self.persistent.stats() if self.persistent is not None else None
+        }
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+def _model_file(model_name: str, filename: str) -> str:
+    """``filename`` from a local model directory or the model's Hugging Face repo"""
+    local = Path(model_name) / filename
+    if local.exists():
+        return str(local)
+    from huggingface_hub import hf_hub_download
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return hf_hub_download(repo_id, filename)
+
+
+BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+
+
+def create_backend(kind: str, model_name: str, threads: Optional[int] = None, batch_size: int = 64,
+                   int8_file: str = "onnx/model_quint8_avx2.onnx") -> EmbeddingBackend:
+    """Embedding backend by name: one of ``BACKENDS``"""
+    if kind == "sentence-transformers":
+        return SentenceTransformerBackend(model_name, threads=threads, batch_size=batch_size)
+    if kind == "onnx":
+        return ONNXBackend(model_name, threads=threads, batch_size=batch_size)
+    if kind == "onnx-int8":
+        return ONNXBackend(model_name, onnx_file=int8_file, threads=threads, batch_size=batch_size,
+                           name="onnx-int8")
+    raise ValueError(f"Unknown embedding backend {kind!r}; expected one of {BACKENDS}")
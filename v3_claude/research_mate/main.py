@@ -11,25 +11,46 @@ Architecture:
 """
 
 import asyncio
+import base64
+import copy
+import functools
+import heapq
+import itertools
 import json
+import os
 import uuid
 import hashlib
 import time
+import threading
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from datetime import datetime, timedelta, date
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Callable, AsyncIterator, Literal, Sequence, Type
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import chromadb
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 import arxiv
-from sentence_transformers import SentenceTransformer
 import re
 from urllib.parse import urlparse
 import logging
+import numpy as np
+
+from cache import LRUTTLCache, PersistentCompletionCache, PersistentEmbeddingCache, SingleFlight
+from embeddings import CachedEmbeddingBackend, EmbeddingBackend, create_backend
+from persistence import SQLiteDatabase
+
+# LLM routing and structured output are shared with the other apps in this repository
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+from llm_router import LLMRouter, endpoints_from_env
+from structured_output import (ModelT, StructuredOutputError, max_output_tokens, n_predict_for,
+                               parse_structured, schema_for)
 
 # =============================================================================
 # Configuration & Logging
@@ -52,18 +73,120 @@ logger = logging.getLogger(__name__)
 
 class Config:
     LLAMA_SERVER_URL = "http://localhost:8080"
+    # Pool of llama.cpp servers (env LLAMA_SERVER_URLS, comma-separated); requests
+    # go to the least busy healthy one and fail over between them
+    LLAMA_SERVER_URLS = endpoints_from_env(LLAMA_SERVER_URL)
+    LLM_HEALTH_CHECK_SECONDS = 10
+    LLM_CIRCUIT_FAILURES = 3  # consecutive failures before an endpoint is taken out
+    LLM_CIRCUIT_RESET_SECONDS = 30
+    # Model tiers - each tier is a pool of llama.cpp servers running one model
+    # (env LLAMA_SMALL_SERVER_URLS / LLAMA_LARGE_SERVER_URLS). Both default to
+    # LLAMA_SERVER_URLS, i.e. one model for every step; a small-model server
+    # (run_llama_cpp.sh with SMALL_MODEL set) is opt-in.
+    MODEL_TIERS = {
+        "small": endpoints_from_env(",".join(LLAMA_SERVER_URLS), "LLAMA_SMALL_SERVER_URLS"),  # e.g. 3B
+        "large": endpoints_from_env(",".join(LLAMA_SERVER_URLS), "LLAMA_LARGE_SERVER_URLS"),  # e.g. 8B
+    }
+    # Tier -> tier that serves its calls while none of its servers is available
+    MODEL_TIER_FALLBACKS = {"small": "large"}
+    # Pipeline step -> tier: short classification/analysis outputs go to the small model
+    STEP_MODEL_TIERS = {"classify": "small", "analyze": "small", "synthesize": "large"}
+    DEFAULT_MODEL_TIER = "large"
     DATABASE_PATH = "researchmate.db"
     CHROMA_PATH = "./chroma_db"
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-    MAX_CONTEXT_LENGTH = 4096
+    EMBEDDING_BATCH_SIZE = 64
+    # "sentence-transformers" (PyTorch fp32), "onnx" or "onnx-int8" (ONNX Runtime, see embeddings.py);
+    # vectors differ slightly between backends, so switch on a fresh CHROMA_PATH
+    EMBEDDING_BACKEND = os.environ.get("RESEARCHMATE_EMBEDDING_BACKEND", "sentence-transformers")
+    EMBEDDING_THREADS: Optional[int] = None  # encoder threads; None = runtime default
+    EMBEDDING_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"  # onnx/model_qint8_avx512.onnx on AVX-512 CPUs
+    # Embedding memoization by (model, text hash): in-memory LRU over an on-disk float32 store
+    EMBEDDING_CACHE = True
+    EMBEDDING_CACHE_SIZE = 50000
+    EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024  # ~40k MiniLM vectors
+    EMBEDDING_CACHE_DB_PATH = "embedding_cache.db"  # None keeps the cache in memory only
+    DUPLICATE_SIMILARITY = 0.9  # title-vs-stored-abstract similarity treated as the same paper
+
+    # Local paper library: BM25 (SQLite FTS5) fused with vector search
+    LIBRARY_CANDIDATES = 50  # per retriever, before fusion and filtering
+    LIBRARY_RRF_K = 60  # reciprocal rank fusion constant
+    LIBRARY_TITLE_WEIGHT = 2.0  # BM25 weight of title matches relative to abstract matches
+    # execute_research answers from the library, skipping remote discovery, when at
+    # least LIBRARY_MIN_PAPERS stored papers reach LIBRARY_MIN_SIMILARITY (search_papers scale)
+    LIBRARY_FIRST = True
+    LIBRARY_MIN_PAPERS = 3
+    LIBRARY_MIN_SIMILARITY = 0.5
+    LIBRARY_MAX_PAPERS = 6
+    MAX_CONTEXT_LENGTH = 4096  # tokens per request (llama.cpp --ctx_size / --parallel)
+
+    # Prompt packing - prompts are fitted to the context window by token count
+    PROMPT_SAFETY_MARGIN = 64  # tokens held back for tokenizer/template drift
+    CHARS_PER_TOKEN_ESTIMATE = 3.5  # fallback when /tokenize is unavailable
+    TOKEN_COUNT_CACHE_SIZE = 10000
+    ANALYSIS_MAX_TOKENS = 384  # ceiling; the PaperAnalysis schema bound (~330) normally applies
+    SYNTHESIS_MAX_TOKENS = 400
+    CLASSIFICATION_ABSTRACT_TOKENS = 60  # abstract excerpt per paper when classifying
+
+    # Concurrency - slots per llama.cpp server until its /props reports total_slots
+    # (the server's --parallel)
+    LLM_PARALLEL_SLOTS = 4
+    # Reuse the server's KV cache: send cache_prompt and pin requests that share a
+    # prompt prefix to the same slot (id_slot)
+    LLM_PROMPT_CACHE = True
+    # Threads for blocking job stages (HTTP, embeddings, SQLite, Chroma) so they
+    # never run on the event loop
+    JOB_EXECUTOR_WORKERS = 16
+    # Shared threads for concurrent LLM calls within a job (per-paper analysis,
+    # map-reduce synthesis); each call still waits for a server slot
+    LLM_EXECUTOR_WORKERS = 16
+    # Serve requests immediately and load the embedding model, Chroma and the
+    # LLM probes in a background warm-up (env RESEARCHMATE_LAZY_STARTUP=0 to
+    # load everything before the server starts)
+    LAZY_STARTUP = os.environ.get("RESEARCHMATE_LAZY_STARTUP", "1") != "0"
+
+    # Job scheduling - workers share one llama.cpp server, so keep this small
+    JOB_WORKERS = 2
+    MAX_QUEUED_JOBS = 50
+    JOB_ETA_INITIAL_SECONDS = 45  # ETA estimate until real job durations are observed
+
+    # Job store: live jobs stay in memory, finished ones are kept in an LRU and
+    # otherwise loaded from the research_jobs table on demand
+    FINISHED_JOBS_IN_MEMORY = 200
+    # Stage checkpoints of finished jobs are kept this long for retries and
+    # re-runs, then pruned (checked at most hourly); the request parameters stay
+    CHECKPOINT_RETENTION_HOURS = 24
+
+    # Server-Sent Events
+    EVENT_HISTORY_JOBS = 100  # recent jobs whose event history is replayable
+    SSE_KEEPALIVE_SECONDS = 15
+
+    # Paper sources (queried concurrently during discovery)
+    DISCOVERY_SOURCES = ["arxiv", "semantic_scholar"]
+    ARXIV_API_URL = "https://export.arxiv.org/api/query"
+    SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
 
     # Rate limiting
     ARXIV_RATE_LIMIT = 3  # seconds between requests
     SEMANTIC_SCHOLAR_RATE_LIMIT = 1
 
+    # Per-source discovery deadlines (seconds) - a slow source is dropped, not waited on
+    SOURCE_DEADLINES = {"arxiv": 20, "semantic_scholar": 10}
+    DEFAULT_SOURCE_DEADLINE = 15
+
     # Cache settings
     CACHE_TTL_HOURS = 24
+    # Serve a previous query's results when its embedding is at least this similar
+    # (1 - squared L2 distance, as in search_papers); above 1.0 disables it
+    SEMANTIC_CACHE_THRESHOLD = 0.85
     MAX_CACHE_SIZE = 1000
+    MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+    # On-disk LLM completion cache, shared across restarts and worker processes
+    PERSISTENT_LLM_CACHE = True
+    LLM_CACHE_DB_PATH = "llm_cache.db"
+    LLM_CACHE_WARM_ENTRIES = 500  # loaded into memory at startup
+    LLM_MODEL_IDS: Dict[str, str] = {}  # tier -> overrides the model name reported by its servers
 
 
 config = Config()
@@ -78,6 +201,9 @@ class ResearchQuery(BaseModel):
     research_focus: Optional[str] = None
     max_papers: int = 5
     classification_focus: Optional[str] = "methodology"  # methodology, findings, theory
+    priority: str = "normal"  # high, normal, low
+    cache_threshold: Optional[float] = None  # overrides Config.SEMANTIC_CACHE_THRESHOLD
+    use_library: Optional[bool] = None  # overrides Config.LIBRARY_FIRST
 
 
 class ResearchJob(BaseModel):
@@ -95,16 +221,73 @@ class Paper(BaseModel):
     authors: List[str]
     abstract: str
     arxiv_id: Optional[str] = None
+    doi: Optional[str] = None
     paper_url: Optional[str] = None
     published: Optional[str] = None
     venue: Optional[str] = None
     citation_count: Optional[int] = None
 
 
+class LibraryFilters(BaseModel):
+    venue: Optional[str] = None  # exact match, case-insensitive
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    min_citations: Optional[int] = None
+
+
+SearchMode = Literal["hybrid", "keyword", "vector"]
+
+
+PaperType = Literal["theoretical", "empirical", "review", "survey", "position"]
+Rating = Literal["high", "medium", "low"]
+
+
 class Classification(BaseModel):
     category: str
     confidence: float
     reasoning: str
+    quality: Optional[str] = None
+    relevance: Optional[int] = None  # 1-10
+
+
+class PaperAnalysis(BaseModel):
+    """Per-paper analysis and classification, decoded against this model's JSON schema.
+
+    String lengths bound the generation, and with it ``n_predict``.
+    """
+    contribution: str = Field(max_length=200)
+    method: str = Field(max_length=280)
+    category: PaperType
+    quality: Rating
+    relevance: int = Field(ge=1, le=10)
+    relevance_reason: str = Field(max_length=120)
+    confidence: float = Field(ge=0, le=1)
+
+    def to_markdown(self) -> str:
+        """The analysis text shown in reports and fed to synthesis"""
+        return "\n".join([
+            f"1. **Main Contribution:** {self.contribution}",
+            f"2. **Key Method/Finding:** {self.method}",
+            f"3. **Classification:** {self.category} (quality: {self.quality})",
+            f"4. **Relevance Score:** {self.relevance}/10 - {self.relevance_reason}",
+        ])
+
+    def classification(self) -> Classification:
+        return Classification(category=self.category, confidence=self.confidence, reasoning=self.contribution,
+                              quality=self.quality, relevance=self.relevance)
+
+
+class PaperClassification(BaseModel):
+    category: PaperType
+    quality: Rating
+    relevance: int = Field(ge=1, le=10)
+    confidence: float = Field(ge=0, le=1)
+    reasoning: str = Field(max_length=100)
+
+
+class ClassificationBatch(BaseModel):
+    """Batch classification output: one entry per paper, in prompt order"""
+    classifications: List[PaperClassification]
 
 
 # =============================================================================
@@ -112,7 +295,12 @@ class Classification(BaseModel):
 # =============================================================================
 
 class PromptTemplates:
-    """Model-specific prompt templates optimized for small LLMs"""
+    """Model-specific prompt templates optimized for small LLMs.
+
+    Instructions come before per-item content so that prompts of one kind share
+    a byte-identical prefix, which llama.cpp serves from the slot's KV cache
+    instead of re-evaluating it.
+    """
 
     @staticmethod
     def get_analysis_prompt(paper: Paper, focus: str = "methodology") -> str:
@@ -121,65 +309,68 @@ class PromptTemplates:
 You are a research assistant analyzing academic papers. Be concise and specific.
 <|eot_id|><|start_header_id|>user<|end_header_id|>
 
-Analyze this paper focusing on {focus}:
+Analyze the paper below focusing on {focus}. Reply with a JSON object:
+- "contribution": main contribution (1 sentence)
+- "method": key method/finding (1-2 sentences)
+- "category": theoretical/empirical/review/survey/position
+- "quality": high/medium/low (based on clarity and contribution)
+- "relevance": relevance score 1-10
+- "relevance_reason": brief reason for the score
+- "confidence": confidence in the category, 0-1
 
 **Title:** {paper.title}
 **Authors:** {', '.join(paper.authors[:3])}{"..." if len(paper.authors) > 3 else ""}
-**Abstract:** {paper.abstract[:800]}{"..." if len(paper.abstract) > 800 else ""}
-
-Provide:
-1. **Main Contribution** (1 sentence)
-2. **Key Method/Finding** (1-2 sentences)  
-3. **Classification** (theoretical/empirical/review/survey)
-4. **Relevance Score** (1-10 with brief reason)
+**Abstract:** {paper.abstract}
 
 <|eot_id|><|start_header_id|>assistant<|end_header_id|>"""
 
     @staticmethod
-    def get_synthesis_prompt(query: str, analyses: List[str]) -> str:
-        """Synthesis prompt for multiple paper analyses"""
-        analyses_text = "\n\n".join([f"Paper {i + 1}: {analysis}" for i, analysis in enumerate(analyses)])
+    def get_synthesis_prompt(query: str, analyses: List[str], labels: Optional[List[str]] = None,
+                             heading: str = "Paper Analyses") -> str:
+        """Synthesis prompt for multiple paper analyses (or partial syntheses)"""
+        labels = labels or [f"Paper {i + 1}" for i in range(len(analyses))]
+        analyses_text = "\n\n".join([f"{label}: {analysis}" for label, analysis in zip(labels, analyses)])
 
         return f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
 You are synthesizing research findings. Be structured and insightful.
 <|eot_id|><|start_header_id|>user<|end_header_id|>
 
-**Research Query:** {query}
-
-**Paper Analyses:**
-{analyses_text[:2000]}{"..." if len(analyses_text) > 2000 else ""}
-
 Provide a synthesis covering:
 1. **Common Themes** (2-3 key patterns)
 2. **Methodological Trends** (what approaches dominate)
 3. **Knowledge Gaps** (what's missing)
 4. **Key Insights** (actionable takeaways)
 
+**Research Query:** {query}
+
+**{heading}:**
+{analyses_text}
+
 <|eot_id|><|start_header_id|>assistant<|end_header_id|>"""
 
     @staticmethod
-    def get_classification_prompt(papers: List[Paper]) -> str:
-        """Classify multiple papers efficiently"""
+    def get_classification_prompt(papers: List[Paper], start: int = 1) -> str:
+        """Classify multiple papers efficiently (abstracts are pre-fitted excerpts)"""
         papers_text = "\n".join([
-            f"{i + 1}. {paper.title} - {paper.abstract[:200]}..."
-            for i, paper in enumerate(papers[:5])
+            f"{i}. {paper.title} - {paper.abstract}"
+            for i, paper in enumerate(papers, start=start)
         ])
 
         return f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
 Classify research papers by type and quality.
 <|eot_id|><|start_header_id|>user<|end_header_id|>
 
+Reply with a JSON object whose "classifications" list has one entry per paper, in order:
+- "category": theoretical/empirical/review/survey/position
+- "quality": high/medium/low (based on clarity and contribution)
+- "relevance": relevance to the research domain, 1-10
+- "confidence": confidence in the category, 0-1
+- "reasoning": one short phrase
+
 Classify these papers:
 
 {papers_text}
 
-For each paper, provide:
-- **Type:** theoretical/empirical/review/survey/position
-- **Quality:** high/medium/low (based on clarity and contribution)
-- **Relevance:** high/medium/low (to the research domain)
-
-Format: "Paper X: Type=Y, Quality=Z, Relevance=W"
-
 <|eot_id|><|start_header_id|>assistant<|end_header_id|>"""
 
 
@@ -187,14 +378,243 @@ Format: "Paper X: Type=Y, Quality=Z, Relevance=W"
 # Enhanced LLM Client with Caching
 # =============================================================================
 
-class LocalLLMClient:
-    """Enhanced interface to local llama.cpp server with caching and retries"""
+class LLMError(Exception):
+    """Raised when no llama.cpp server of a tier could produce a completion"""
+
+
+class SlotPool:
+    """Assigns llama.cpp server slots to requests, with prefix affinity.
+
+    A request takes a free slot, preferring the one that last served the same
+    ``slot_key`` (prompt kind) so the shared prefix is still in its KV cache,
+    otherwise the least recently used one. Blocks while all slots are busy.
+    The pool starts at a configured guess and is resized to the server's own
+    slot count once known (``sized``).
+    """
+
+    def __init__(self, num_slots: int):
+        self.num_slots = num_slots
+        self.sized = False
+        self._free: "OrderedDict[int, Optional[str]]" = OrderedDict((slot, None) for slot in range(num_slots))
+        self._available = threading.Condition()
+        self.affinity_hits = 0
+        self.assignments = 0
+
+    def acquire(self, slot_key: Optional[str] = None) -> int:
+        with self._available:
+            while not self._free:
+                self._available.wait()
+            slot = next((s for s, key in self._free.items() if slot_key and key == slot_key), None)
+            if slot is None:
+                slot = next(iter(self._free))  # least recently used
+            else:
+                self.affinity_hits += 1
+            del self._free[slot]
+            self.assignments += 1
+            return slot
+
+    def release(self, slot: int, slot_key: Optional[str] = None):
+        with self._available:
+            if slot < self.num_slots:  # slots beyond a shrunk pool are retired
+                self._free[slot] = slot_key
+                self._available.notify()
+
+    def resize(self, num_slots: int):
+        """Match the server's slot count; new slots are handed out first"""
+        with self._available:
+            for slot in range(self.num_slots, num_slots):
+                self._free[slot] = None
+                self._free.move_to_end(slot, last=False)
+            for slot in [slot for slot in self._free if slot >= num_slots]:
+                del self._free[slot]
+            self.num_slots = num_slots
+            self.sized = True
+            self._available.notify_all()
+
+    @contextmanager
+    def slot(self, slot_key: Optional[str] = None):
+        slot = self.acquire(slot_key)
+        try:
+            yield slot
+        finally:
+            self.release(slot, slot_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.num_slots,
+            "assignments": self.assignments,
+            "affinity_hits": self.affinity_hits,
+            "affinity_rate": round(self.affinity_hits / self.assignments, 3) if self.assignments else 0.0
+        }
+
 
-    def __init__(self, server_url: str = config.LLAMA_SERVER_URL):
-        self.server_url = server_url
-        self.cache = {}
-        self.session = self._create_session()
+class ModelTier:
+    """One model tier: the router over its llama.cpp servers, their slot pools and
+    per-tier latency/token metrics.
+
+    Tiers configured with the same servers share the router and slot pools but
+    keep separate metrics.
+    """
+
+    def __init__(self, name: str, router: LLMRouter, slot_pools: Dict[str, SlotPool],
+                 model_id: Optional[str] = None):
+        self.name = name
+        self.router = router
+        self.slot_pools = slot_pools
+        self._model_id = model_id
+        self.tokenize_retry_at = 0.0  # /tokenize is skipped until then after a failure
+        self.metrics = {"requests": 0, "latency_s": 0.0, "prompt_tokens": 0, "cached_tokens": 0,
+                        "prompt_ms": 0.0, "predicted_tokens": 0, "predicted_ms": 0.0}
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """Identity of the served model, part of every cache key.
+
+        Read from llama.cpp's /props (falling back to /v1/models) until it succeeds;
+        "unknown" while the servers are unreachable.
+        """
+        if self._model_id is None:
+            try:
+                props = self.router.get("/props", timeout=5).json()
+                model_path = props.get("model_path") or props.get("default_generation_settings", {}).get("model")
+                if not model_path:
+                    models = self.router.get("/v1/models", timeout=5).json()
+                    model_path = models["data"][0]["id"]
+                self._model_id = Path(model_path).name
+            except (requests.RequestException, ValueError, KeyError, IndexError):
+                return "unknown"
+        return self._model_id
+
+    @property
+    def total_slots(self) -> int:
+        """Slots across the tier's servers"""
+        return sum(pool.num_slots for pool in self.slot_pools.values())
+
+    def record(self, result: Dict, latency: float):
+        """Accumulate one completion's latency and llama.cpp's token timings"""
+        timings = result.get("timings") or {}
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["latency_s"] += latency
+            self.metrics["prompt_tokens"] += timings.get("prompt_n", 0)
+            self.metrics["cached_tokens"] += result.get("tokens_cached", 0)
+            self.metrics["prompt_ms"] += timings.get("prompt_ms", 0.0)
+            self.metrics["predicted_tokens"] += timings.get("predicted_n", 0)
+            self.metrics["predicted_ms"] += timings.get("predicted_ms", 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+        requests_made = metrics["requests"]
+        return {
+            "model": self.model_id,
+            "servers": [endpoint.url for endpoint in self.router.endpoints],
+            "requests": requests_made,
+            "avg_latency_ms": round(metrics["latency_s"] * 1000 / requests_made, 1) if requests_made else 0.0,
+            "prompt_tokens": metrics["prompt_tokens"],
+            "cached_tokens": metrics["cached_tokens"],
+            "predicted_tokens": metrics["predicted_tokens"],
+            "prompt_ms": round(metrics["prompt_ms"], 1),
+            "avg_prompt_ms": round(metrics["prompt_ms"] / requests_made, 1) if requests_made else 0.0,
+            # Decode speed on the server vs. end-to-end output tokens per second of request time
+            "generation_tokens_per_s": round(metrics["predicted_tokens"] * 1000 / metrics["predicted_ms"], 1)
+            if metrics["predicted_ms"] else 0.0,
+            "tokens_per_s": round(metrics["predicted_tokens"] / metrics["latency_s"], 1)
+            if metrics["latency_s"] else 0.0,
+            "slots": {url: pool.stats() for url, pool in self.slot_pools.items()}
+        }
+
+
+class LocalLLMClient:
+    """Enhanced interface to local llama.cpp servers with caching and failover.
+
+    Each model tier in ``Config.MODEL_TIERS`` is a pool of servers spread over by
+    the shared LLMRouter; every server in a tier is expected to serve the same
+    model. Calls pick a tier with ``tier=`` (``Config.DEFAULT_MODEL_TIER`` if omitted).
+    """
+
+    def __init__(self, server_urls: Optional[List[str]] = None, connect: bool = True):
+        if isinstance(server_urls, str):
+            server_urls = [server_urls]
+        self.cache = LRUTTLCache(
+            max_entries=config.MAX_CACHE_SIZE,
+            max_bytes=config.MAX_CACHE_BYTES,
+            ttl_seconds=config.CACHE_TTL_HOURS * 3600
+        )
+        self.persistent_cache = None
+        if config.PERSISTENT_LLM_CACHE:
+            self.persistent_cache = PersistentCompletionCache(
+                config.LLM_CACHE_DB_PATH,
+                ttl_seconds=config.CACHE_TTL_HOURS * 3600
+            )
+        self.inflight = SingleFlight()
+        self.token_counts = LRUTTLCache(max_entries=config.TOKEN_COUNT_CACHE_SIZE,
+                                        sizeof=lambda key, value: 0)
+        self.tiers: Dict[str, ModelTier] = {}
+        if server_urls:
+            self.set_endpoints(server_urls)
+        else:
+            self.set_tiers(config.MODEL_TIERS)
+        for router in self.routers():
+            router.start_health_checks()
+        if connect:
+            self.connect()
+
+    def connect(self):
+        """Probe every server and warm the completion cache (blocking)"""
         self.test_connection()
+        self.warm_cache()
+
+    def set_endpoints(self, server_urls: List[str]):
+        """Serve every tier from the same ``server_urls``"""
+        self.set_tiers({name: server_urls for name in config.MODEL_TIERS})
+
+    def set_tiers(self, tier_urls: Dict[str, List[str]]):
+        """(Re)build one router and per-server slot pools per distinct server list"""
+        for router in self.routers():
+            router.stop()
+
+        pools: Dict[Tuple[str, ...], Tuple[LLMRouter, Dict[str, SlotPool]]] = {}
+        tiers = {}
+        for name, server_urls in tier_urls.items():
+            key = tuple(server_urls)
+            if key not in pools:
+                router = LLMRouter(
+                    server_urls,
+                    failure_threshold=config.LLM_CIRCUIT_FAILURES,
+                    reset_timeout=config.LLM_CIRCUIT_RESET_SECONDS,
+                    health_interval=config.LLM_HEALTH_CHECK_SECONDS,
+                    # Transport retries only help when there is no other server to fail over to
+                    session=self._create_session() if len(server_urls) == 1 else None,
+                    pool_maxsize=max(config.LLM_PARALLEL_SLOTS * len(server_urls), 10)
+                )
+                pools[key] = (router, {endpoint.url: SlotPool(config.LLM_PARALLEL_SLOTS)
+                                       for endpoint in router.endpoints})
+            router, slot_pools = pools[key]
+            tiers[name] = ModelTier(name, router, slot_pools, config.LLM_MODEL_IDS.get(name))
+        self.tiers = tiers
+
+    def tier(self, name: Optional[str] = None) -> ModelTier:
+        """The named tier, or its fallback (``Config.MODEL_TIER_FALLBACKS``) while
+        every server of the tier is unhealthy or circuit-broken"""
+        model_tier = self.tiers[name or config.DEFAULT_MODEL_TIER]
+        fallback = self.tiers.get(config.MODEL_TIER_FALLBACKS.get(model_tier.name))
+        if fallback is not None and not model_tier.router.available():
+            return fallback
+        return model_tier
+
+    def routers(self) -> List[LLMRouter]:
+        """Distinct routers across tiers"""
+        return list({id(tier.router): tier.router for tier in self.tiers.values()}.values())
+
+    @property
+    def router(self) -> LLMRouter:
+        return self.tier().router
+
+    @property
+    def server_url(self) -> str:
+        return self.router.primary_url
 
     def _create_session(self):
         """Create requests session with retries"""
@@ -204,36 +624,164 @@ class LocalLLMClient:
             backoff_factor=1,
             status_forcelist=[500, 502, 503, 504]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_maxsize=max(config.LLM_PARALLEL_SLOTS, 10)
+        )
         session.mount("http://", adapter)
         return session
 
-    def test_connection(self):
-        """Test if llama.cpp server is running"""
+    def slot_pool(self, model_tier: ModelTier, base_url: str) -> SlotPool:
+        """The server's slot pool, sized from its /props ``total_slots`` on first use.
+
+        Until the server answers, the pool keeps ``Config.LLM_PARALLEL_SLOTS``
+        and the next call probes again.
+        """
+        pool = model_tier.slot_pools[base_url]
+        if pool.sized:
+            return pool
         try:
-            response = self.session.get(f"{self.server_url}/health", timeout=5)
-            logger.info(f"✅ Connected to llama.cpp server at {self.server_url}")
-        except requests.RequestException as e:
-            logger.error(f"❌ Cannot connect to llama.cpp server: {e}")
-            logger.error("Please start llama.cpp server: ./server -m model.gguf --host 0.0.0.0 --port 8080")
+            response = model_tier.router.session.get(f"{base_url}/props", timeout=5)
+            response.raise_for_status()
+            total_slots = response.json().get("total_slots")
+        except (requests.RequestException, ValueError):
+            return pool
+        if total_slots:
+            if total_slots != pool.num_slots:
+                logger.info(f"🎰 {base_url} has {total_slots} slots")
+            pool.resize(int(total_slots))
+        else:
+            logger.warning(f"⚠️ {base_url} does not report total_slots; assuming {pool.num_slots}")
+            pool.sized = True
+        return pool
 
-    def _get_cache_key(self, prompt: str, max_tokens: int, temperature: float) -> str:
-        """Generate cache key for prompt"""
-        content = f"{prompt}{max_tokens}{temperature}"
+    def test_connection(self):
+        """Test if the llama.cpp servers of every tier are running"""
+        for router in self.routers():
+            health = router.check_health()
+            names = ", ".join(name for name, tier in self.tiers.items() if tier.router is router)
+            healthy = [url for url, ok in health.items() if ok]
+            if healthy:
+                router_tier = next(tier for tier in self.tiers.values() if tier.router is router)
+                for url in healthy:
+                    self.slot_pool(router_tier, url)
+                model = router_tier.model_id
+                logger.info(f"✅ Connected to llama.cpp server(s) at {', '.join(healthy)} "
+                            f"(tier: {names}, model: {model})")
+            for url, ok in health.items():
+                if not ok:
+                    logger.error(f"❌ Cannot connect to llama.cpp server at {url} (tier: {names})")
+            if not healthy:
+                logger.error("Please start llama.cpp server: ./server -m model.gguf --host 0.0.0.0 --port 8080")
+
+    @property
+    def model_id(self) -> str:
+        """Model served by the default tier"""
+        return self.tier().model_id
+
+    def count_tokens(self, text: str, tier: Optional[str] = None) -> int:
+        """Token count of ``text`` under the tier's model tokenizer.
+
+        Uses llama.cpp's /tokenize and caches the result per (model, text). While
+        the endpoint is unavailable, falls back to a character-based estimate
+        (not cached, so real counts replace it once the server is back).
+        """
+        if not text:
+            return 0
+        model_tier = self.tier(tier)
+        key = (model_tier.model_id, hashlib.sha1(text.encode("utf-8")).hexdigest())
+        count = self.token_counts.get(key)
+        if count is not None:
+            return count
+
+        if time.monotonic() >= model_tier.tokenize_retry_at:
+            try:
+                response = model_tier.router.post("/tokenize", json={"content": text}, timeout=5)
+                response.raise_for_status()
+                count = len(response.json()["tokens"])
+                self.token_counts.set(key, count)
+                return count
+            except (requests.RequestException, ValueError, KeyError) as e:
+                logger.warning(f"⚠️ /tokenize unavailable, estimating token counts: {e}")
+                model_tier.tokenize_retry_at = time.monotonic() + 60
+        return int(len(text) / config.CHARS_PER_TOKEN_ESTIMATE) + 1
+
+    def warm_cache(self):
+        """Load the most recent persistent completions into the memory cache"""
+        if not self.persistent_cache:
+            return
+        purged = self.persistent_cache.purge_expired()
+        entries = self.persistent_cache.warm_entries(min(config.LLM_CACHE_WARM_ENTRIES, config.MAX_CACHE_SIZE))
+        for cache_key, content in entries:
+            self.cache.set(cache_key, content)
+        logger.info(f"🔥 Warmed LLM cache with {len(entries)} completions ({purged} expired purged)")
+
+    def clear_cache(self):
+        self.cache.clear()
+        if self.persistent_cache:
+            self.persistent_cache.clear()
+
+    def _get_cache_key(self, prompt: str, max_tokens: int, temperature: float, model_id: str,
+                       json_schema: Optional[Dict] = None) -> str:
+        """Generate cache key for prompt (scoped to the serving model and output schema)"""
+        content = f"{model_id}{prompt}{max_tokens}{temperature}"
+        if json_schema:
+            content += json.dumps(json_schema, sort_keys=True)
         return hashlib.md5(content.encode()).hexdigest()
 
-    def generate(self, prompt: str, max_tokens: int = 300, temperature: float = 0.3) -> str:
-        """Generate text with caching - optimized for small models"""
-        cache_key = self._get_cache_key(prompt, max_tokens, temperature)
+    def generate(self, prompt: str, max_tokens: int = 300, temperature: float = 0.3,
+                 slot_key: Optional[str] = None, tier: Optional[str] = None,
+                 json_schema: Optional[Dict] = None) -> str:
+        """Generate text with caching - optimized for small models.
+
+        ``slot_key`` names the prompt kind; requests with the same key are pinned
+        to the server slot that already holds their shared prefix. ``tier`` picks
+        the model tier. ``json_schema`` constrains decoding to JSON matching it.
+        Raises LLMError when no server answers; failures are never cached.
+        """
+        model_tier = self.tier(tier)
+        cache_key = self._get_cache_key(prompt, max_tokens, temperature, model_tier.model_id, json_schema)
 
         # Check cache first
-        if cache_key in self.cache:
-            cached_result, timestamp = self.cache[cache_key]
-            if datetime.now() - timestamp < timedelta(hours=config.CACHE_TTL_HOURS):
-                logger.info("📋 Cache hit")
+        cached_result = self.cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("📋 Cache hit")
+            return cached_result
+
+        if self.persistent_cache:
+            cached_result = self.persistent_cache.get(cache_key)
+            if cached_result is not None:
+                logger.info("💽 Persistent cache hit")
+                self.cache.set(cache_key, cached_result)
                 return cached_result
 
-        # Generate new response
+        # Identical prompts already in flight share one upstream call
+        return self.inflight.do(
+            cache_key,
+            lambda: self._generate_uncached(cache_key, prompt, max_tokens, temperature, slot_key, model_tier,
+                                            json_schema)
+        )
+
+    def generate_structured(self, prompt: str, model: Type[ModelT], max_tokens: Optional[int] = None,
+                            temperature: float = 0.2, slot_key: Optional[str] = None,
+                            tier: Optional[str] = None, json_schema: Optional[Dict] = None) -> ModelT:
+        """Generate an instance of ``model`` with grammar-constrained decoding.
+
+        The model's JSON schema (or ``json_schema``, a narrowed copy of it) goes to
+        llama.cpp, ``n_predict`` is capped at the most tokens a conforming object
+        can take, and the completion is validated. Raises StructuredOutputError,
+        carrying the raw completion, when it does not validate.
+        """
+        schema = json_schema or schema_for(model)
+        text = self.generate(prompt, max_tokens=n_predict_for(schema, max_tokens), temperature=temperature,
+                             slot_key=slot_key, tier=tier, json_schema=schema)
+        result = parse_structured(text, model)
+        if result is None:
+            raise StructuredOutputError(f"Completion does not match {model.__name__}", text)
+        return result
+
+    def _build_payload(self, prompt: str, max_tokens: int, temperature: float,
+                       slot: Optional[int] = None, json_schema: Optional[Dict] = None) -> Dict:
         payload = {
             "prompt": prompt,
             "n_predict": max_tokens,
@@ -243,59 +791,295 @@ class LocalLLMClient:
             "repeat_penalty": 1.1,
             "stop": ["<|eot_id|>", "<|end_of_text|>", "\n\n---", "User:", "Human:"]
         }
+        if json_schema:
+            # llama.cpp compiles the schema to a grammar and constrains sampling to it
+            payload["json_schema"] = json_schema
+        if config.LLM_PROMPT_CACHE:
+            payload["cache_prompt"] = True
+            if slot is not None:
+                payload["id_slot"] = slot
+        return payload
+
+    def tier_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: tier.stats() for name, tier in self.tiers.items()}
+
+    def _store_completion(self, cache_key: str, content: str, model_id: str):
+        # LRU eviction and TTL expiry handled by the cache
+        self.cache.set(cache_key, content)
+        if self.persistent_cache:
+            self.persistent_cache.set(cache_key, model_id, content)
+
+    def _generate_uncached(self, cache_key: str, prompt: str, max_tokens: int, temperature: float,
+                           slot_key: Optional[str], model_tier: ModelTier,
+                           json_schema: Optional[Dict] = None) -> str:
+        """Call a llama.cpp server of ``model_tier`` and fill the caches"""
+        def complete(base_url: str) -> Dict:
+            with self.slot_pool(model_tier, base_url).slot(slot_key) as slot:
+                response = model_tier.router.session.post(
+                    f"{base_url}/completion",
+                    json=self._build_payload(prompt, max_tokens, temperature, slot, json_schema),
+                    headers={"Content-Type": "application/json"},
+                    timeout=60
+                )
+            response.raise_for_status()
+            return response.json()
 
         try:
-            response = self.session.post(
-                f"{self.server_url}/completion",
-                json=payload,
+            start = time.monotonic()
+            result = model_tier.router.call(complete, affinity=slot_key)
+            model_tier.record(result, time.monotonic() - start)
+            content = result.get("content", "").strip()
+            self._store_completion(cache_key, content, model_tier.model_id)
+            return content
+
+        except requests.RequestException as e:
+            logger.error(f"LLM generation failed: {e}")
+            raise LLMError(f"Could not generate response - {e}") from e
+
+    def generate_stream(self, prompt: str, on_token: Callable[[str], None],
+                        max_tokens: int = 300, temperature: float = 0.3,
+                        slot_key: Optional[str] = None, tier: Optional[str] = None) -> str:
+        """Generate text with llama.cpp streaming, calling ``on_token`` per chunk.
+
+        Returns the full completion, which is cached like ``generate``. A cache
+        hit is delivered to ``on_token`` as a single chunk. Raises LLMError when
+        the completion fails, including after tokens were emitted.
+        """
+        model_tier = self.tier(tier)
+        cache_key = self._get_cache_key(prompt, max_tokens, temperature, model_tier.model_id)
+        cached_result = self.cache.get(cache_key)
+        if cached_result is None and self.persistent_cache:
+            cached_result = self.persistent_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("📋 Cache hit (stream)")
+            on_token(cached_result)
+            return cached_result
+
+        chunks = []
+        final: Dict[str, Any] = {}
+
+        def read_events(response):
+            # chunk_size=None hands over each chunk as it arrives instead of buffering
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                chunk = json.loads(line[len("data: "):])
+                token = chunk.get("content", "")
+                if token:
+                    # Leading whitespace is dropped to match generate()'s strip()
+                    if not chunks:
+                        token = token.lstrip()
+                    if token:
+                        chunks.append(token)
+                        on_token(token)
+                if chunk.get("stop"):
+                    final.update(chunk)  # carries llama.cpp's timings
+                    break
+
+        def stream(base_url: str):
+            with self.slot_pool(model_tier, base_url).slot(slot_key) as slot, model_tier.router.session.post(
+                f"{base_url}/completion",
+                json={**self._build_payload(prompt, max_tokens, temperature, slot), "stream": True},
                 headers={"Content-Type": "application/json"},
-                timeout=60
-            )
-            response.raise_for_status()
+                timeout=60,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                try:
+                    read_events(response)
+                except requests.RequestException as e:
+                    if chunks:
+                        # Tokens already went out: don't fail over and replay them
+                        raise ValueError(f"stream interrupted: {e}") from e
+                    raise
 
-            content = response.json().get("content", "").strip()
+        try:
+            # Fails over only until the first token has been emitted
+            start = time.monotonic()
+            model_tier.router.call(stream, affinity=slot_key)
+            model_tier.record(final, time.monotonic() - start)
+            content = "".join(chunks).strip()
+            self._store_completion(cache_key, content, model_tier.model_id)
+            return content
 
-            # Cache the result
-            if len(self.cache) > config.MAX_CACHE_SIZE:
-                # Remove oldest entries
-                oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-                del self.cache[oldest_key]
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"LLM streaming generation failed: {e}")
+            raise LLMError(f"Could not generate response - {e}") from e
 
-            self.cache[cache_key] = (content, datetime.now())
-            return content
 
-        except requests.RequestException as e:
-            logger.error(f"LLM generation failed: {e}")
-            return f"Error: Could not generate response - {e}"
+# =============================================================================
+# Prompt Packing
+# =============================================================================
+
+class PromptPacker:
+    """Fits prompts to the context window by token count.
+
+    Every prompt gets ``Config.MAX_CONTEXT_LENGTH`` minus its ``n_predict`` and a
+    safety margin. Long texts are trimmed to what is left after the template, and
+    lists of items (papers, analyses) are split into consecutive batches that
+    each fit in one prompt. Tokens are counted with the model of ``tier``.
+    """
+
+    ITEM_OVERHEAD_TOKENS = 8  # label and separator around each packed item
+
+    def __init__(self, llm: LocalLLMClient, tier: Optional[str] = None):
+        self.llm = llm
+        self.tier = tier
+
+    def count_tokens(self, text: str) -> int:
+        return self.llm.count_tokens(text, self.tier)
+
+    def prompt_budget(self, max_tokens: int) -> int:
+        return config.MAX_CONTEXT_LENGTH - max_tokens - config.PROMPT_SAFETY_MARGIN
+
+    def fit_text(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of ``text`` (cut at a word boundary) within ``max_tokens``"""
+        count = self.count_tokens(text)
+        if count <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+
+        # Start from the proportional cut, then shrink until it fits
+        chars = int(len(text) * max_tokens / count)
+        while chars > 0:
+            candidate = text[:chars].rsplit(" ", 1)[0] + "..."
+            if self.count_tokens(candidate) <= max_tokens:
+                return candidate
+            chars = int(chars * 0.9)
+        return ""
+
+    def fit_paper(self, paper: Paper, build_prompt: Callable[[Paper], str], max_tokens: int) -> Paper:
+        """Copy of ``paper`` with the abstract trimmed so ``build_prompt`` fits the budget"""
+        without_abstract = self.count_tokens(build_prompt(paper.model_copy(update={"abstract": ""})))
+        abstract = self.fit_text(paper.abstract, self.prompt_budget(max_tokens) - without_abstract)
+        return paper if abstract == paper.abstract else paper.model_copy(update={"abstract": abstract})
+
+    def pack(self, items: List[str], fixed_tokens: int, max_tokens: int,
+             tokens_per_item: int = 0) -> List[List[int]]:
+        """Split item indices into consecutive batches that each fit one prompt.
+
+        ``fixed_tokens`` is the template cost; ``tokens_per_item`` reserves extra
+        output per item on top of ``max_tokens``. Items too large to fit even
+        alone get a batch of their own (callers trim them with ``fit_text``).
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for index, item in enumerate(items):
+            cost = self.count_tokens(item) + self.ITEM_OVERHEAD_TOKENS
+            budget = self.prompt_budget(max_tokens + tokens_per_item * (len(current) + 1)) - fixed_tokens
+            if current and used + cost > budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def item_budget(self, fixed_tokens: int, max_tokens: int) -> int:
+        """Largest single item that fits next to the template"""
+        return self.prompt_budget(max_tokens) - fixed_tokens - self.ITEM_OVERHEAD_TOKENS
+
+
+# =============================================================================
+# Rate Limiting
+# =============================================================================
+
+class RateLimiter:
+    """Per-source rate-limit scheduler.
+
+    Each caller reserves the next free request slot under a lock and then sleeps
+    outside it, so concurrent callers are spaced ``min_interval`` apart without
+    blocking callers of other sources.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until this caller's slot arrives; returns seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
 
 
 # =============================================================================
 # Enhanced Tools with PDF Alternatives
 # =============================================================================
 
+def map_bounded(executor: ThreadPoolExecutor, func: Callable[[Any], Any], items, limit: int) -> List[Any]:
+    """``executor.map`` on a shared pool with at most ``limit`` items in flight.
+
+    ``limit`` tasks each take the next item until none are left; results are
+    in input order. After a failure no new items start, and the first
+    exception is re-raised.
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    indices = iter(range(len(items)))
+    lock = threading.Lock()
+    failed = threading.Event()
+
+    def lane():
+        while not failed.is_set():
+            with lock:
+                index = next(indices, None)
+            if index is None:
+                return
+            try:
+                results[index] = func(items[index])
+            except BaseException:
+                failed.set()
+                raise
+
+    for future in [executor.submit(lane) for _ in range(min(limit, len(items)))]:
+        future.result()
+    return results
+
+
 class ResearchTools:
     """Enhanced tools focusing on robust content retrieval"""
 
     def __init__(self, llm_client: LocalLLMClient, memory: 'MemoryManager'):
         self.llm = llm_client
         self.memory = memory
-        self.last_arxiv_call = 0
-        self.last_s2_call = 0
+        # One packer per tier: token counts depend on the tier's tokenizer
+        self.packers = {name: PromptPacker(llm_client, name) for name in config.MODEL_TIERS}
         self.session = requests.Session()
+        self.rate_limiters = {
+            "arxiv": RateLimiter(config.ARXIV_RATE_LIMIT),
+            "semantic_scholar": RateLimiter(config.SEMANTIC_SCHOLAR_RATE_LIMIT)
+        }
+        self.sources = {
+            "arxiv": self.search_arxiv,
+            "semantic_scholar": self.search_semantic_scholar
+        }
+        # Shared pool so an abandoned (past-deadline) search never blocks the caller
+        self.discovery_executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.sources),
+            thread_name_prefix="discovery"
+        )
+        # Long-lived, so the threads' SQLite connections (checkpoints, completion
+        # cache) are reused rather than opened per job
+        self.llm_executor = ThreadPoolExecutor(
+            max_workers=config.LLM_EXECUTOR_WORKERS,
+            thread_name_prefix="llm"
+        )
 
     def _rate_limit(self, service: str):
         """Implement rate limiting"""
-        now = time.time()
-        if service == "arxiv":
-            time_since_last = now - self.last_arxiv_call
-            if time_since_last < config.ARXIV_RATE_LIMIT:
-                time.sleep(config.ARXIV_RATE_LIMIT - time_since_last)
-            self.last_arxiv_call = time.time()
-        elif service == "semantic_scholar":
-            time_since_last = now - self.last_s2_call
-            if time_since_last < config.SEMANTIC_SCHOLAR_RATE_LIMIT:
-                time.sleep(config.SEMANTIC_SCHOLAR_RATE_LIMIT - time_since_last)
-            self.last_s2_call = time.time()
+        if service in self.rate_limiters:
+            self.rate_limiters[service].acquire()
 
     def search_arxiv(self, query: str, max_results: int = 5) -> List[Paper]:
         """Search arXiv with rate limiting"""
@@ -303,6 +1087,7 @@ class ResearchTools:
 
         try:
             client = arxiv.Client()
+            client.query_url_format = f"{config.ARXIV_API_URL}?{{}}"
             search = arxiv.Search(
                 query=query,
                 max_results=max_results,
@@ -316,6 +1101,7 @@ class ResearchTools:
                     authors=[author.name for author in result.authors],
                     abstract=result.summary.strip(),
                     arxiv_id=result.entry_id.split('/')[-1],
+                    doi=result.doi,
                     paper_url=result.entry_id,
                     published=result.published.strftime("%Y-%m-%d"),
                     venue="arXiv"
@@ -334,11 +1120,11 @@ class ResearchTools:
         self._rate_limit("semantic_scholar")
 
         try:
-            url = "https://api.semanticscholar.org/graph/v1/paper/search"
+            url = config.SEMANTIC_SCHOLAR_API_URL
             params = {
                 "query": query,
                 "limit": max_results,
-                "fields": "title,authors,abstract,url,venue,year,citationCount"
+                "fields": "title,authors,abstract,url,venue,year,citationCount,externalIds"
             }
 
             response = self.session.get(url, params=params, timeout=10)
@@ -354,7 +1140,9 @@ class ResearchTools:
                         paper_url=item.get("url"),
                         venue=item.get("venue"),
                         published=str(item.get("year", "")),
-                        citation_count=item.get("citationCount", 0)
+                        citation_count=item.get("citationCount", 0),
+                        arxiv_id=(item.get("externalIds") or {}).get("ArXiv"),
+                        doi=(item.get("externalIds") or {}).get("DOI")
                     )
                     papers.append(paper)
 
@@ -365,6 +1153,65 @@ class ResearchTools:
             logger.error(f"Semantic Scholar search failed: {e}")
             return []
 
+    def _timed_search(self, source: str, query: str, max_results: int) -> Tuple[List[Paper], float]:
+        start = time.perf_counter()
+        papers = self.sources[source](query, max_results)
+        return papers, time.perf_counter() - start
+
+    def discover_papers(self, query: str, max_results: int = 3,
+                        sources: Optional[List[str]] = None) -> Tuple[List[Paper], Dict[str, Dict]]:
+        """Query all paper sources concurrently and merge results as they arrive.
+
+        Each source is bounded by its own deadline (``Config.SOURCE_DEADLINES``); a
+        source that misses it is reported as ``timeout`` and its results dropped.
+        Returns the merged papers plus a per-source report of status, count and latency.
+        """
+        sources = [s for s in (sources or config.DISCOVERY_SOURCES) if s in self.sources]
+        start = time.monotonic()
+        deadlines = {}
+        pending = {}
+        for source in sources:
+            future = self.discovery_executor.submit(self._timed_search, source, query, max_results)
+            pending[future] = source
+            deadlines[source] = start + config.SOURCE_DEADLINES.get(source, config.DEFAULT_SOURCE_DEADLINE)
+
+        papers: List[Paper] = []
+        seen_titles = set()
+        report: Dict[str, Dict] = {}
+
+        while pending:
+            timeout = max(0.0, min(deadlines[s] for s in pending.values()) - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    source_papers, latency = future.result()
+                except Exception as e:
+                    logger.error(f"{source} discovery failed: {e}")
+                    report[source] = {"status": "error", "papers": 0, "error": str(e)}
+                    continue
+
+                added = 0
+                for paper in source_papers:
+                    title_key = re.sub(r"\W+", " ", paper.title.lower()).strip()
+                    if title_key not in seen_titles:
+                        seen_titles.add(title_key)
+                        papers.append(paper)
+                        added += 1
+                report[source] = {"status": "ok", "papers": added, "latency": round(latency, 3)}
+
+            now = time.monotonic()
+            for future, source in list(pending.items()):
+                if not future.done() and now >= deadlines[source]:
+                    future.cancel()
+                    del pending[future]
+                    logger.warning(f"⏱️ {source} missed its discovery deadline; continuing without it")
+                    report[source] = {"status": "timeout", "papers": 0,
+                                      "latency": round(now - start, 3)}
+
+        return papers, report
+
     def fetch_url_content(self, url: str) -> str:
         """Fetch and extract text content from URLs"""
         try:
@@ -386,47 +1233,273 @@ class ResearchTools:
             logger.error(f"URL fetch failed for {url}: {e}")
             return ""
 
-    def analyze_paper_batch(self, papers: List[Paper], focus: str = "methodology") -> List[str]:
-        """Analyze multiple papers efficiently"""
-        analyses = []
+    def analyze_paper(self, paper: Paper, focus: str = "methodology"
+                      ) -> Tuple[str, Optional[Classification], float]:
+        """Analyze and classify a single paper in one structured call.
+
+        Returns (analysis, classification, latency in seconds). The classification
+        is None when the output did not match the PaperAnalysis schema; the raw
+        completion is then kept as the analysis. LLMError propagates so the
+        caller fails instead of keeping an analysis that never ran.
+        """
+        start = time.perf_counter()
+        tier = config.STEP_MODEL_TIERS["analyze"]
+        classification = None
+        try:
+            paper = self.packers[tier].fit_paper(
+                paper, lambda p: PromptTemplates.get_analysis_prompt(p, focus),
+                n_predict_for(schema_for(PaperAnalysis), config.ANALYSIS_MAX_TOKENS)
+            )
+            prompt = PromptTemplates.get_analysis_prompt(paper, focus)
+            structured = self.llm.generate_structured(prompt, PaperAnalysis, max_tokens=config.ANALYSIS_MAX_TOKENS,
+                                                      temperature=0.3, slot_key=f"analysis:{focus}", tier=tier)
+            analysis, classification = structured.to_markdown(), structured.classification()
+        except StructuredOutputError as e:
+            analysis = e.text
+        except LLMError:
+            raise
+        except Exception as e:
+            logger.error(f"Analysis failed for paper {paper.title}: {e}")
+            analysis = f"Analysis failed: {e}"
+
+        latency = time.perf_counter() - start
+        logger.info(f"🧪 Analyzed in {latency:.2f}s: {paper.title[:50]}...")
+        return analysis, classification, latency
+
+    def analyze_paper_batch_timed(
+        self, papers: List[Paper], focus: str = "methodology", max_workers: Optional[int] = None,
+        on_result: Optional[Callable[[int, Paper, str, Optional[Classification], float], None]] = None
+    ) -> List[Tuple[str, Optional[Classification], float]]:
+        """Analyze papers concurrently across the llama.cpp server slots.
+
+        Results are returned in the same order as ``papers``. ``on_result`` is
+        called from the worker thread as each paper finishes.
+        """
+        if not papers:
+            return []
 
-        for paper in papers:
-            try:
-                prompt = PromptTemplates.get_analysis_prompt(paper, focus)
-                analysis = self.llm.generate(prompt, max_tokens=200, temperature=0.3)
-                analyses.append(analysis)
+        def analyze(index: int) -> Tuple[str, Optional[Classification], float]:
+            analysis, classification, latency = self.analyze_paper(papers[index], focus)
+            if on_result:
+                on_result(index, papers[index], analysis, classification, latency)
+            return analysis, classification, latency
 
-                # Brief pause between analyses
-                time.sleep(0.5)
+        workers = min(max_workers or self.llm.tier(config.STEP_MODEL_TIERS["analyze"]).total_slots, len(papers))
+        if workers <= 1:
+            return [analyze(index) for index in range(len(papers))]
 
-            except Exception as e:
-                logger.error(f"Analysis failed for paper {paper.title}: {e}")
-                analyses.append(f"Analysis failed: {e}")
+        return map_bounded(self.llm_executor, analyze, range(len(papers)), workers)
 
-        return analyses
+    def analyze_paper_batch(self, papers: List[Paper], focus: str = "methodology") -> List[str]:
+        """Analyze multiple papers efficiently"""
+        return [analysis for analysis, _, _ in self.analyze_paper_batch_timed(papers, focus)]
 
     def classify_papers(self, papers: List[Paper]) -> Dict[str, Classification]:
-        """Classify papers by type and quality"""
+        """Classify papers by type and quality, keyed ``paper_<n>`` (1-based).
+
+        Papers are packed into as few prompts as fit; each batch is decoded
+        against a schema with exactly one entry per paper. Papers in a batch
+        whose output does not validate are left out rather than guessed.
+        Raises LLMError when the server cannot be reached.
+        """
+        tier = config.STEP_MODEL_TIERS["classify"]
+        packer = self.packers[tier]
         try:
-            prompt = PromptTemplates.get_classification_prompt(papers)
-            classification_text = self.llm.generate(prompt, max_tokens=300, temperature=0.2)
+            excerpts = [
+                paper.model_copy(update={
+                    "abstract": packer.fit_text(paper.abstract, config.CLASSIFICATION_ABSTRACT_TOKENS)
+                })
+                for paper in papers
+            ]
+            # As many papers per prompt as the context window allows, reserving
+            # each paper's bounded JSON entry in the output
+            batches = packer.pack(
+                [f"{paper.title} - {paper.abstract}" for paper in excerpts],
+                fixed_tokens=packer.count_tokens(PromptTemplates.get_classification_prompt([])),
+                max_tokens=0,
+                tokens_per_item=max_output_tokens(schema_for(PaperClassification)) + 1
+            )
 
-            # Parse classification results (simple regex parsing)
             classifications = {}
-            for i, paper in enumerate(papers):
-                paper_key = f"paper_{i + 1}"
-                classifications[paper_key] = Classification(
-                    category="empirical",  # Default
-                    confidence=0.7,
-                    reasoning=f"Classified from batch analysis: {classification_text[:100]}..."
-                )
+            for batch in batches:
+                schema = copy.deepcopy(schema_for(ClassificationBatch))
+                schema["properties"]["classifications"].update(minItems=len(batch), maxItems=len(batch))
+                prompt = PromptTemplates.get_classification_prompt([excerpts[i] for i in batch], start=batch[0] + 1)
+                try:
+                    parsed = self.llm.generate_structured(prompt, ClassificationBatch, slot_key="classification",
+                                                          tier=tier, json_schema=schema)
+                except StructuredOutputError:
+                    parsed = None
+                if parsed is None or len(parsed.classifications) != len(batch):
+                    logger.warning(f"⚠️ Unparseable classification for papers {batch[0] + 1}-{batch[-1] + 1}")
+                    continue
+                for i, entry in zip(batch, parsed.classifications):
+                    classifications[f"paper_{i + 1}"] = Classification(**entry.model_dump())
 
             return classifications
 
+        except LLMError:
+            raise
         except Exception as e:
             logger.error(f"Classification failed: {e}")
             return {}
 
+    def classify_analyzed(self, papers: List[Paper], classifications: List[Optional[Dict]]) -> Dict[str, Any]:
+        """Classifications keyed ``paper_<n>``: taken from the structured analyses,
+        with one batch classification call only for papers that have none"""
+        missing = [index for index, classification in enumerate(classifications) if classification is None]
+        result = {f"paper_{index + 1}": classification
+                  for index, classification in enumerate(classifications) if classification is not None}
+        if missing:
+            logger.info(f"🏷️ Classifying {len(missing)} paper(s) without a structured analysis")
+            batch = self.classify_papers([papers[index] for index in missing])
+            for position, index in enumerate(missing):
+                classification = batch.get(f"paper_{position + 1}")
+                if classification is not None:
+                    result[f"paper_{index + 1}"] = classification
+        return dict(sorted(result.items(), key=lambda item: int(item[0].split("_")[1])))
+
+
+# =============================================================================
+# Paper Identity
+# =============================================================================
+
+def normalize_doi(doi: str) -> str:
+    doi = doi.strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi
+
+
+def normalize_title(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def paper_identity_keys(paper: Paper) -> List[str]:
+    """Deterministic identity keys for a paper, strongest first"""
+    keys = []
+    if paper.arxiv_id:
+        # Versions (v1, v2, ...) are the same paper
+        keys.append(f"arxiv:{re.sub(r'v[0-9]+$', '', paper.arxiv_id.strip().lower())}")
+    if paper.doi:
+        keys.append(f"doi:{normalize_doi(paper.doi)}")
+    title = normalize_title(paper.title)
+    if title:
+        keys.append(f"title:{hashlib.sha1(title.encode()).hexdigest()}")
+    return keys
+
+
+def stable_paper_id(paper: Paper) -> str:
+    """Content-derived paper ID: the same paper always gets the same ID"""
+    keys = paper_identity_keys(paper)
+    if not keys:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"researchmate:{keys[0]}"))
+
+
+def published_year(published: Optional[str]) -> Optional[int]:
+    match = re.match(r"\d{4}", published or "")
+    return int(match.group()) if match else None
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: each ID scores sum(1 / (k + rank)) over the lists it appears in"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def search_scope(query: str, *parts: Any) -> str:
+    """Fingerprint of a search (query, filters, mode) that a cursor belongs to"""
+    return hashlib.sha1(json.dumps([query, *parts], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, scope: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset, "scope": scope}).encode()).decode()
+
+
+def decode_cursor(cursor: str, scope: str) -> int:
+    """Offset encoded in ``cursor``; ValueError if malformed or from another search"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset = int(state["offset"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Malformed cursor") from e
+    if state.get("scope") != scope or offset < 0:
+        raise ValueError("Cursor does not belong to this search")
+    return offset
+
+
+def make_serializable(obj):
+    """Convert Pydantic models and other objects to JSON-serializable format"""
+    if hasattr(obj, 'model_dump'):  # Pydantic model
+        return obj.model_dump()
+    elif isinstance(obj, dict):
+        return {k: make_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [make_serializable(item) for item in obj]
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    else:
+        return obj
+
+
+# =============================================================================
+# Lazy Initialization
+# =============================================================================
+
+class Lazy:
+    """A component built on first use (thread-safe), e.g. the embedding model.
+
+    With ``Config.LAZY_STARTUP`` the agent builds these in a background warm-up
+    after the server starts; a request that needs one earlier builds it itself
+    (concurrent callers wait for the same build).
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.load_seconds: Optional[float] = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    start = time.perf_counter()
+                    value = self.factory()
+                    self.load_seconds = time.perf_counter() - start
+                    self._value = value
+                    logger.info(f"⚙️ Loaded {self.name} in {self.load_seconds:.2f}s")
+        return self._value
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+
+def _load_chroma_client():
+    import chromadb  # deferred: importing chromadb takes ~1s
+    return chromadb.PersistentClient(path=config.CHROMA_PATH)
+
+
+def _load_embedding_model() -> EmbeddingBackend:
+    backend = create_backend(config.EMBEDDING_BACKEND, config.EMBEDDING_MODEL, threads=config.EMBEDDING_THREADS,
+                             batch_size=config.EMBEDDING_BATCH_SIZE, int8_file=config.EMBEDDING_ONNX_INT8_FILE)
+    if not config.EMBEDDING_CACHE:
+        return backend
+    persistent = PersistentEmbeddingCache(config.EMBEDDING_CACHE_DB_PATH) if config.EMBEDDING_CACHE_DB_PATH else None
+    return CachedEmbeddingBackend(backend, config.EMBEDDING_MODEL, max_entries=config.EMBEDDING_CACHE_SIZE,
+                                  max_bytes=config.EMBEDDING_CACHE_MAX_BYTES, persistent=persistent)
+
 
 # =============================================================================
 # Enhanced Memory Manager
@@ -436,15 +1509,48 @@ class MemoryManager:
     """Enhanced memory with better caching and persistence"""
 
     def __init__(self):
-        self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_PATH)
-        self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
-        self.papers_collection = self.chroma_client.get_or_create_collection("papers")
-        self.queries_collection = self.chroma_client.get_or_create_collection("query_cache")
+        # Chroma and the embedding model load on first use (see Lazy)
+        self.components = {
+            "chroma": Lazy("chroma", _load_chroma_client),
+            "embedding_model": Lazy("embedding model", _load_embedding_model),
+            "papers_collection": Lazy("papers collection", self._load_papers_collection),
+            "queries_collection": Lazy("query cache collection",
+                                       lambda: self.chroma_client.get_or_create_collection("query_cache")),
+            "library_index": Lazy("library index", self._sync_library_index),
+        }
+        self.query_cache_stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+        self.db = SQLiteDatabase(config.DATABASE_PATH)
         self.init_database()
 
+    @property
+    def chroma_client(self):
+        return self.components["chroma"].get()
+
+    @property
+    def embedding_model(self):
+        return self.components["embedding_model"].get()
+
+    @property
+    def papers_collection(self):
+        return self.components["papers_collection"].get()
+
+    @property
+    def queries_collection(self):
+        return self.components["queries_collection"].get()
+
+    def load(self):
+        """Build every lazy component now"""
+        for component in self.components.values():
+            component.get()
+
     def init_database(self):
         """Initialize SQLite with enhanced schema"""
-        conn = sqlite3.connect(config.DATABASE_PATH)
+        with self.db.transaction() as conn:
+            self._create_schema(conn)
+
+    @staticmethod
+    def _create_schema(conn):
         conn.execute("""
             CREATE TABLE IF NOT EXISTS research_jobs (
                 job_id TEXT PRIMARY KEY,
@@ -466,26 +1572,71 @@ class MemoryManager:
                 hit_count INTEGER DEFAULT 1
             )
                      """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS paper_identity (
+                identity_key TEXT PRIMARY KEY,
+                paper_id TEXT NOT NULL
+            )
+                     """)
+        # Local paper library: stored papers (mirroring the Chroma papers
+        # collection) with an FTS5 inverted index over titles and abstracts
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS library_papers (
+                id INTEGER PRIMARY KEY,
+                paper_id TEXT UNIQUE NOT NULL,
+                title TEXT,
+                abstract TEXT,
+                authors TEXT,
+                arxiv_id TEXT,
+                doi TEXT,
+                paper_url TEXT,
+                published TEXT,
+                year INTEGER,
+                venue TEXT,
+                citation_count INTEGER
+            )
+                     """)
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS library_fts USING fts5(
+                title, abstract, content='library_papers', content_rowid='id'
+            )
+                     """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS library_papers_insert AFTER INSERT ON library_papers BEGIN
+                INSERT INTO library_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+            END
+                     """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS library_papers_delete AFTER DELETE ON library_papers BEGIN
+                INSERT INTO library_fts (library_fts, rowid, title, abstract)
+                VALUES ('delete', old.id, old.title, old.abstract);
+            END
+                     """)
         conn.execute("CREATE INDEX IF NOT EXISTS idx_query_hash ON research_jobs(query_hash)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON research_jobs(created_at)")
-        conn.commit()
-        conn.close()
+
+        # Per-stage pipeline outputs, so jobs can resume or re-run single stages
+        conn.execute("""
+                     CREATE TABLE IF NOT EXISTS job_checkpoints
+                     (
+                         job_id TEXT,
+                         stage TEXT,
+                         output TEXT,
+                         created_at TIMESTAMP,
+                         PRIMARY KEY (job_id, stage)
+                     )
+                     """)
 
     def get_query_hash(self, query: str) -> str:
         """Generate hash for query caching"""
         return hashlib.md5(query.lower().strip().encode()).hexdigest()
 
-    def check_query_cache(self, query: str) -> Optional[Dict]:
-        """Check if we've seen this query before"""
-        query_hash = self.get_query_hash(query)
-
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        cursor = conn.execute(
+    def _load_cached_results(self, query_hash: str) -> Optional[Dict]:
+        """Load unexpired cached results by query hash, counting the hit"""
+        row = self.db.query_one(
             "SELECT results, created_at FROM query_cache WHERE query_hash = ?",
             (query_hash,)
         )
-        row = cursor.fetchone()
-        conn.close()
 
         if row:
             results_str, created_at_str = row
@@ -493,96 +1644,837 @@ class MemoryManager:
 
             # Check if cache is still valid
             if datetime.now() - created_at < timedelta(hours=config.CACHE_TTL_HOURS):
-                logger.info("💾 Query cache hit")
+                # Hit counters are batched rather than committed on the read path
+                self.db.defer("UPDATE query_cache SET hit_count = hit_count + 1 WHERE query_hash = ?",
+                              (query_hash,))
                 return json.loads(results_str)
 
         return None
 
+    def check_query_cache(self, query: str) -> Optional[Dict]:
+        """Check if we've seen this query before"""
+        results = self._load_cached_results(self.get_query_hash(query))
+        if results:
+            logger.info("💾 Query cache hit")
+        return results
+
+    def check_similar_query(self, query: str, threshold: Optional[float] = None) -> Optional[Dict]:
+        """Serve results of the nearest previous query if it is similar enough"""
+        threshold = config.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        if threshold > 1.0 or self.queries_collection.count() == 0:
+            return None
+
+        query_embedding = self.embedding_model.encode(query).tolist()
+        nearest = self.queries_collection.query(
+            query_embeddings=[query_embedding],
+            n_results=1,
+            include=["distances", "metadatas", "documents"]
+        )
+        if not nearest["ids"][0]:
+            return None
+
+        similarity = 1 - nearest["distances"][0][0]
+        if similarity < threshold:
+            return None
+
+        results = self._load_cached_results(nearest["metadatas"][0][0]["query_hash"])
+        if results is None:
+            return None  # Matched query has expired
+
+        matched_query = nearest["documents"][0][0]
+        logger.info(f"🧭 Semantic query cache hit ({similarity:.2f}): '{query}' ~ '{matched_query}'")
+        results["cache"] = {
+            "type": "semantic",
+            "requested_query": query,
+            "matched_query": matched_query,
+            "similarity": round(similarity, 4)
+        }
+        return results
+
+    def find_cached_result(self, query: str, threshold: Optional[float] = None) -> Optional[Dict]:
+        """Exact query cache first, then the semantic query cache"""
+        results = self.check_query_cache(query)
+        outcome = "exact_hits"
+        if results is None:
+            results = self.check_similar_query(query, threshold)
+            outcome = "semantic_hits" if results is not None else "misses"
+        with self._stats_lock:
+            self.query_cache_stats[outcome] += 1
+        return results
+
+    def get_query_cache_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.query_cache_stats)
+        lookups = sum(stats.values())
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        stats["semantic_threshold"] = config.SEMANTIC_CACHE_THRESHOLD
+        return stats
+
+    def get_embedding_cache_stats(self) -> Optional[Dict]:
+        """Embedding memoization stats; None until the model is loaded or with EMBEDDING_CACHE off"""
+        if not self.components["embedding_model"].loaded:
+            return None
+        model = self.embedding_model
+        return model.stats() if isinstance(model, CachedEmbeddingBackend) else None
+
+    def clear_query_cache(self):
+        self.db.execute("DELETE FROM query_cache")
+
+        self.chroma_client.delete_collection("query_cache")
+        self.components["queries_collection"].set(self.chroma_client.get_or_create_collection("query_cache"))
+
     def store_query_result(self, query: str, results: Dict):
         """Store query results in cache"""
         query_hash = self.get_query_hash(query)
 
         # Convert results to JSON-serializable format
-        serializable_results = self._make_serializable(results)
+        serializable_results = make_serializable(results)
 
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("""
+        self.db.execute("""
             INSERT OR REPLACE INTO query_cache 
             (query_hash, query, results, created_at)
             VALUES (?, ?, ?, ?)
         """, (query_hash, query, json.dumps(serializable_results), datetime.now().isoformat()))
-        conn.commit()
-        conn.close()
-
-    def _make_serializable(self, obj):
-        """Convert Pydantic models and other objects to JSON-serializable format"""
-        if hasattr(obj, 'model_dump'):  # Pydantic model
-            return obj.model_dump()
-        elif isinstance(obj, dict):
-            return {k: self._make_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._make_serializable(item) for item in obj]
-        elif isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        else:
-            return obj
 
-    def store_paper(self, paper: Paper) -> str:
-        """Store paper with deduplication"""
-        paper_id = str(uuid.uuid4())
+        # Index the query for semantic lookups
+        self.queries_collection.upsert(
+            embeddings=[self.embedding_model.encode(query).tolist()],
+            documents=[query],
+            metadatas=[{"query_hash": query_hash, "created_at": datetime.now().isoformat()}],
+            ids=[query_hash]
+        )
+
+    @staticmethod
+    def _filter_fields(published: Optional[str], venue: Optional[str]) -> Dict:
+        """Metadata that LibraryFilters match on in Chroma ``where`` clauses:
+        an integer year (absent when unknown - Chroma has no nulls) and a
+        lowercased venue"""
+        fields = {"venue_key": (venue or "").lower()}
+        year = published_year(published)
+        if year is not None:
+            fields["year"] = year
+        return fields
+
+    @classmethod
+    def _paper_metadata(cls, paper: Paper) -> Dict:
+        return {
+            "title": paper.title,
+            "authors": json.dumps(paper.authors),
+            "arxiv_id": paper.arxiv_id or "",
+            "doi": paper.doi or "",
+            "paper_url": paper.paper_url or "",
+            "published": paper.published or "",
+            "venue": paper.venue or "",
+            "citation_count": paper.citation_count or 0,
+            **cls._filter_fields(paper.published, paper.venue)
+        }
 
-        # Check for duplicates by title similarity
-        existing = self.search_papers(paper.title, n_results=1)
+    def _load_papers_collection(self):
+        """The papers collection, with filter fields added to papers stored
+        before they existed (once; recorded in the collection's metadata)"""
+        collection = self.chroma_client.get_or_create_collection("papers")
+        if (collection.metadata or {}).get("filter_fields"):
+            return collection
+
+        batch_size = self.chroma_client.get_max_batch_size()
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            collection.update(ids=batch["ids"], metadatas=[
+                {**metadata, **self._filter_fields(metadata.get("published"), metadata.get("venue"))}
+                for metadata in batch["metadatas"]
+            ])
+        collection.modify(metadata={**(collection.metadata or {}), "filter_fields": 1})
+        if total:
+            logger.info(f"📚 Added filter fields to {total} stored papers")
+        return collection
+
+    def lookup_identities(self, keys: List[str]) -> Dict[str, str]:
+        """Map identity keys (arXiv ID, DOI, title hash) to stored paper IDs"""
+        found = {}
+        for start in range(0, len(keys), 900):  # stay under SQLite's variable limit
+            chunk = keys[start:start + 900]
+            found.update(self.db.query_all(
+                f"SELECT identity_key, paper_id FROM paper_identity "
+                f"WHERE identity_key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        return found
+
+    def register_identities(self, pairs: List[Tuple[str, str]]):
+        """Record (identity_key, paper_id) pairs; existing keys keep their paper"""
+        self.db.executemany(
+            "INSERT OR IGNORE INTO paper_identity (identity_key, paper_id) VALUES (?, ?)",
+            pairs
+        )
+
+    def store_paper(self, paper: Paper) -> str:
+        """Store paper with deduplication (exact identity first, then semantic)"""
+        keys = paper_identity_keys(paper)
+        known = self.lookup_identities(keys)
+        if known:
+            paper_id = next(known[key] for key in keys if key in known)
+            self.register_identities([(key, paper_id) for key in keys])
+            return paper_id
+
+        paper_id = stable_paper_id(paper)
+
+        # Fall back to duplicates by title similarity
+        existing = self.search_papers(paper.title, n_results=1, include=())
         if existing and len(existing) > 0:
-            if existing[0]["similarity"] > 0.9:  # Very similar title
+            if existing[0]["similarity"] > config.DUPLICATE_SIMILARITY:  # Very similar title
                 logger.info(f"📄 Duplicate paper detected: {paper.title[:50]}...")
+                self.register_identities([(key, existing[0]["id"]) for key in keys])
                 return existing[0]["id"]
 
         # Create embedding
         embedding = self.embedding_model.encode(paper.abstract).tolist()
 
         # Store in ChromaDB
+        metadata = self._paper_metadata(paper)
         self.papers_collection.add(
             embeddings=[embedding],
             documents=[paper.abstract],
-            metadatas=[{
-                "title": paper.title,
-                "authors": json.dumps(paper.authors),
-                "arxiv_id": paper.arxiv_id or "",
-                "paper_url": paper.paper_url or "",
-                "published": paper.published or "",
-                "venue": paper.venue or "",
-                "citation_count": paper.citation_count or 0
-            }],
+            metadatas=[metadata],
             ids=[paper_id]
         )
+        self.index_library([paper_id], [paper.abstract], [metadata])
+        self.register_identities([(key, paper_id) for key in keys])
 
         return paper_id
 
-    def search_papers(self, query: str, n_results: int = 5) -> List[Dict]:
-        """Enhanced semantic search"""
+    def store_papers(self, papers: List[Paper]) -> List[str]:
+        """Bulk store_paper: same deduplication, a handful of round-trips.
+
+        Papers already known by arXiv ID, DOI or normalized title are resolved
+        with one indexed SQLite lookup and never touch the encoder. The rest go
+        through batched semantic dedup. Returns paper IDs in input order.
+        """
+        if not papers:
+            return []
+
+        all_keys = [paper_identity_keys(paper) for paper in papers]
+        known = self.lookup_identities(sorted({key for keys in all_keys for key in keys}))
+
+        paper_ids: List[Optional[str]] = [None] * len(papers)
+        pending: List[int] = []
+        first_in_batch: Dict[str, int] = {}
+        same_as: Dict[int, int] = {}
+        for i, keys in enumerate(all_keys):
+            match = next((known[key] for key in keys if key in known), None)
+            if match:
+                paper_ids[i] = match
+                continue
+            earlier = next((first_in_batch[key] for key in keys if key in first_in_batch), None)
+            if earlier is not None:
+                same_as[i] = earlier
+                continue
+            for key in keys:
+                first_in_batch[key] = i
+            pending.append(i)
+
+        if pending:
+            semantic_ids = self._store_papers_semantic([papers[i] for i in pending])
+            for i, paper_id in zip(pending, semantic_ids):
+                paper_ids[i] = paper_id
+        for i, earlier in same_as.items():
+            paper_ids[i] = paper_ids[earlier]
+
+        logger.info(f"📚 Stored {len(papers)} papers: {len(papers) - len(pending)} resolved by identity, "
+                    f"{len(pending)} checked semantically")
+        self.register_identities([
+            (key, paper_ids[i]) for i, keys in enumerate(all_keys) for key in keys
+        ])
+        return paper_ids
+
+    def _store_papers_semantic(self, papers: List[Paper]) -> List[str]:
+        """Semantic dedup and insert for papers with no identity match.
+
+        All titles and abstracts are encoded in one batched call, every duplicate
+        lookup runs as one multi-query against Chroma, and the survivors are added
+        in one insert (chunked to Chroma's max batch size). Papers within the batch
+        are also deduplicated against earlier ones, as sequential store_paper
+        calls would.
+        """
+        n = len(papers)
+        embeddings = np.asarray(self.embedding_model.encode(
+            [paper.title for paper in papers] + [paper.abstract for paper in papers],
+            batch_size=config.EMBEDDING_BATCH_SIZE
+        ), dtype=np.float32)
+        title_embeddings, abstract_embeddings = embeddings[:n], embeddings[n:]
+        batch_size = self.chroma_client.get_max_batch_size()
+
+        # Duplicates of already-stored papers: one multi-query lookup
+        paper_ids: List[Optional[str]] = [None] * n
+        if self.papers_collection.count() > 0:
+            for start in range(0, n, batch_size):
+                existing = self.papers_collection.query(
+                    query_embeddings=title_embeddings[start:start + batch_size].tolist(),
+                    n_results=1,
+                    include=["distances"]
+                )
+                for offset, (ids, distances) in enumerate(zip(existing["ids"], existing["distances"])):
+                    if ids and 1 - distances[0] > config.DUPLICATE_SIMILARITY:
+                        paper_ids[start + offset] = ids[0]
+
+        # Duplicates within the batch: compare each title with earlier abstracts,
+        # using the same (squared L2) similarity Chroma reports
+        earlier_matches: Dict[int, List[int]] = {}
+        abstract_norms = (abstract_embeddings ** 2).sum(axis=1)
+        for start in range(0, n, 1024):
+            titles = title_embeddings[start:start + 1024]
+            distances = ((titles ** 2).sum(axis=1)[:, None] + abstract_norms[None, :]
+                         - 2 * titles @ abstract_embeddings.T)
+            similar = (1 - distances) > config.DUPLICATE_SIMILARITY
+            for row, col in zip(*np.nonzero(similar)):
+                i = start + row
+                if col < i:
+                    earlier_matches.setdefault(i, []).append(col)
+
+        survivors: List[int] = []
+        survivor_set = set()
+        for i, paper in enumerate(papers):
+            if paper_ids[i] is None:
+                match = next((j for j in earlier_matches.get(i, []) if j in survivor_set), None)
+                if match is not None:
+                    paper_ids[i] = paper_ids[match]
+                else:
+                    paper_ids[i] = stable_paper_id(paper)
+                    survivors.append(i)
+                    survivor_set.add(i)
+                    continue
+            logger.info(f"📄 Duplicate paper detected: {paper.title[:50]}...")
+
+        for start in range(0, len(survivors), batch_size):
+            chunk = survivors[start:start + batch_size]
+            ids = [paper_ids[i] for i in chunk]
+            documents = [papers[i].abstract for i in chunk]
+            metadatas = [self._paper_metadata(papers[i]) for i in chunk]
+            self.papers_collection.add(
+                embeddings=abstract_embeddings[chunk].tolist(),
+                documents=documents,
+                metadatas=metadatas,
+                ids=ids
+            )
+            self.index_library(ids, documents, metadatas)
+
+        return paper_ids
+
+    PAPER_FIELDS = ("abstract", "metadata", "authors")
+
+    @staticmethod
+    def _chroma_where(filters: Optional[LibraryFilters]) -> Optional[Dict]:
+        """Chroma ``where`` clause for ``filters`` (None when nothing is filtered)"""
+        conditions = []
+        if filters is not None:
+            if filters.venue:
+                conditions.append({"venue_key": filters.venue.lower()})
+            year_from, year_to = filters.year_from, filters.year_to
+            if year_from is not None and year_to is not None and 0 <= year_to - year_from <= 50:
+                # One $in condition: Chroma evaluates each condition of an $and
+                # separately, so a $gte/$lte pair costs about twice as much
+                conditions.append({"year": {"$in": list(range(year_from, year_to + 1))}})
+            else:
+                if year_from is not None:
+                    conditions.append({"year": {"$gte": year_from}})
+                if year_to is not None:
+                    conditions.append({"year": {"$lte": year_to}})
+            if filters.min_citations is not None:
+                conditions.append({"citation_count": {"$gte": filters.min_citations}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def search_papers(self, query: str, n_results: int = 5, filters: Optional[LibraryFilters] = None,
+                      include: Sequence[str] = PAPER_FIELDS, offset: int = 0) -> List[Dict]:
+        """Semantic search over stored papers.
+
+        ``filters`` are pushed down to Chroma as a ``where`` clause, so only
+        matching papers are ranked (Chroma scans metadata first, so filtered
+        queries grow with the collection: ~1s at 1M papers, see
+        bench_vector_query.py). ``include`` projects each result (which
+        always has ``id`` and ``similarity``): "abstract" is the stored document,
+        "metadata" the title, venue, year and citations, and "authors" the
+        decoded author list - callers that only need IDs skip reading and
+        decoding the rest. ``offset`` skips leading results; Chroma still ranks
+        them, so deep pages cost more.
+        """
         query_embedding = self.embedding_model.encode(query).tolist()
+        chroma_include = ["distances"]
+        if "abstract" in include:
+            chroma_include.append("documents")
+        if "metadata" in include or "authors" in include:
+            chroma_include.append("metadatas")
 
         results = self.papers_collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=offset + n_results,
+            where=self._chroma_where(filters),
+            include=chroma_include
         )
 
-        if not results["ids"][0]:  # No results
-            return []
+        hits = []
+        for i in range(offset, len(results["ids"][0])):
+            hit = {"id": results["ids"][0][i], "similarity": 1 - results["distances"][0][i]}
+            if "abstract" in include:
+                hit["abstract"] = results["documents"][0][i]
+            if "metadata" in include:
+                metadata = results["metadatas"][0][i]
+                hit.update({
+                    "title": metadata["title"],
+                    "venue": metadata.get("venue", ""),
+                    "published": metadata.get("published", ""),
+                    "year": metadata.get("year"),
+                    "citation_count": metadata.get("citation_count", 0)
+                })
+            if "authors" in include:
+                hit["authors"] = json.loads(results["metadatas"][0][i]["authors"])
+            hits.append(hit)
+        return hits
+
+    def search_papers_page(self, query: str, page_size: int = 10, filters: Optional[LibraryFilters] = None,
+                           include: Sequence[str] = PAPER_FIELDS, cursor: Optional[str] = None) -> Dict:
+        """One page of search_papers and the cursor of the next page (None after
+        the last); ValueError for a cursor from a different search"""
+        scope = search_scope(query, filters, "vector")
+        offset = decode_cursor(cursor, scope) if cursor else 0
+        hits = self.search_papers(query, page_size + 1, filters, include, offset)  # one extra: is there more?
+        return {
+            "results": hits[:page_size],
+            "next_cursor": encode_cursor(offset + page_size, scope) if len(hits) > page_size else None
+        }
 
-        return [
-            {
-                "id": results["ids"][0][i],
-                "title": results["metadatas"][0][i]["title"],
-                "abstract": results["documents"][0][i],
-                "authors": json.loads(results["metadatas"][0][i]["authors"]),
-                "similarity": 1 - results["distances"][0][i],
-                "venue": results["metadatas"][0][i].get("venue", ""),
-                "citation_count": results["metadatas"][0][i].get("citation_count", 0)
-            }
-            for i in range(len(results["ids"][0]))
+    LIBRARY_COLUMNS = ("paper_id", "title", "abstract", "authors", "arxiv_id", "doi", "paper_url",
+                       "published", "year", "venue", "citation_count")
+
+    def index_library(self, ids: List[str], documents: List[str], metadatas: List[Dict]):
+        """Add stored papers to the library table (the FTS5 index follows by trigger)"""
+        self.db.executemany(
+            f"INSERT OR IGNORE INTO library_papers ({', '.join(self.LIBRARY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self.LIBRARY_COLUMNS))})",
+            [
+                (paper_id, metadata["title"], document, metadata["authors"], metadata.get("arxiv_id", ""),
+                 metadata.get("doi", ""), metadata.get("paper_url", ""), metadata.get("published", ""),
+                 published_year(metadata.get("published")), metadata.get("venue", ""),
+                 metadata.get("citation_count", 0))
+                for paper_id, document, metadata in zip(ids, documents, metadatas)
+            ]
+        )
+
+    def _sync_library_index(self) -> int:
+        """Backfill the library from the papers collection (papers stored before
+        the library existed, or by a process that failed mid-way); returns its size"""
+        indexed = self.library_size()
+        stored = self.papers_collection.count()
+        if indexed < stored:
+            batch_size = self.chroma_client.get_max_batch_size()
+            for offset in range(0, stored, batch_size):
+                batch = self.papers_collection.get(include=["documents", "metadatas"],
+                                                   limit=batch_size, offset=offset)
+                self.index_library(batch["ids"], batch["documents"], batch["metadatas"])
+            indexed = self.library_size()
+            logger.info(f"📚 Library index backfilled: {indexed} papers")
+        return indexed
+
+    def library_size(self) -> int:
+        return self.db.query_one("SELECT COUNT(*) FROM library_papers")[0]
+
+    @staticmethod
+    def _library_filter_sql(filters: Optional[LibraryFilters]) -> Tuple[str, List[Any]]:
+        """`` AND ...`` conditions on library_papers (aliased ``p``) for ``filters``"""
+        clauses, params = [], []
+        if filters is not None:
+            if filters.venue:
+                clauses.append("p.venue = ? COLLATE NOCASE")
+                params.append(filters.venue)
+            if filters.year_from is not None:
+                clauses.append("p.year >= ?")
+                params.append(filters.year_from)
+            if filters.year_to is not None:
+                clauses.append("p.year <= ?")
+                params.append(filters.year_to)
+            if filters.min_citations is not None:
+                clauses.append("p.citation_count >= ?")
+                params.append(filters.min_citations)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def _keyword_search(self, query: str, n_results: int, where: str, params: List[Any]) -> List[str]:
+        """Paper IDs ranked by BM25 over titles and abstracts"""
+        terms = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)  # quoted: no FTS5 query syntax
+        rows = self.db.query_all(
+            f"SELECT p.paper_id FROM library_fts JOIN library_papers p ON p.id = library_fts.rowid "
+            f"WHERE library_fts MATCH ?{where} ORDER BY bm25(library_fts, ?, 1.0) LIMIT ?",
+            (match, *params, config.LIBRARY_TITLE_WEIGHT, n_results)
+        )
+        return [row[0] for row in rows]
+
+    def _library_rows(self, paper_ids: List[str]) -> Dict[str, Dict]:
+        """Library rows for ``paper_ids``, by paper ID"""
+        rows = {}
+        for start in range(0, len(paper_ids), 900):  # stay under SQLite's variable limit
+            chunk = paper_ids[start:start + 900]
+            for row in self.db.query_all(
+                f"SELECT {', '.join(self.LIBRARY_COLUMNS)} FROM library_papers "
+                f"WHERE paper_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ):
+                rows[row[0]] = dict(zip(self.LIBRARY_COLUMNS[1:], row[1:]))
+        return rows
+
+    def search_library(self, query: str, n_results: int = 10, filters: Optional[LibraryFilters] = None,
+                       mode: SearchMode = "hybrid", offset: int = 0) -> List[Dict]:
+        """Hybrid search over the stored papers.
+
+        BM25 over titles and abstracts (SQLite FTS5) and vector search over the
+        abstracts each rank up to LIBRARY_CANDIDATES papers passing ``filters``
+        (in the SQL query and the Chroma ``where`` clause respectively), and the
+        two rankings are combined with reciprocal rank fusion. Results carry
+        their rank in each list and their vector similarity (None for
+        keyword-only matches); ``offset`` skips leading fused results.
+        """
+        self.components["library_index"].get()
+        candidates = max(offset + n_results, config.LIBRARY_CANDIDATES)
+        where, params = self._library_filter_sql(filters)
+
+        keyword_ids: List[str] = []
+        if mode in ("hybrid", "keyword"):
+            keyword_ids = self._keyword_search(query, candidates, where, params)
+
+        vector_ids: List[str] = []
+        similarities: Dict[str, float] = {}
+        if mode in ("hybrid", "vector") and self.papers_collection.count() > 0:
+            hits = self.search_papers(query, n_results=candidates, filters=filters, include=())
+            similarities = {hit["id"]: hit["similarity"] for hit in hits}
+            vector_ids = list(similarities)
+
+        fused = reciprocal_rank_fusion([keyword_ids, vector_ids], k=config.LIBRARY_RRF_K)[offset:offset + n_results]
+        rows = self._library_rows([paper_id for paper_id, _ in fused])
+        keyword_ranks = {paper_id: rank for rank, paper_id in enumerate(keyword_ids, 1)}
+        vector_ranks = {paper_id: rank for rank, paper_id in enumerate(vector_ids, 1)}
+
+        results = []
+        for paper_id, score in fused:
+            row = rows.get(paper_id)
+            if row is None:  # stored in Chroma by another process and not indexed yet
+                continue
+            results.append({
+                "id": paper_id,
+                **row,
+                "authors": json.loads(row["authors"]),
+                "score": round(score, 5),
+                "keyword_rank": keyword_ranks.get(paper_id),
+                "vector_rank": vector_ranks.get(paper_id),
+                "similarity": similarities.get(paper_id)
+            })
+        return results
+
+    def find_library_papers(self, query: str) -> Tuple[List[Paper], int]:
+        """Stored papers that can answer ``query`` without remote discovery.
+
+        Returns up to LIBRARY_MAX_PAPERS papers (in fused order) at or above
+        LIBRARY_MIN_SIMILARITY, or none if fewer than LIBRARY_MIN_PAPERS
+        qualify, together with the number that qualified.
+        """
+        results = self.search_library(query, n_results=config.LIBRARY_CANDIDATES)
+        relevant = [result for result in results
+                    if result["similarity"] is not None and result["similarity"] >= config.LIBRARY_MIN_SIMILARITY]
+        if len(relevant) < config.LIBRARY_MIN_PAPERS:
+            return [], len(relevant)
+        papers = [
+            Paper(title=result["title"], authors=result["authors"], abstract=result["abstract"],
+                  arxiv_id=result["arxiv_id"] or None, doi=result["doi"] or None,
+                  paper_url=result["paper_url"] or None, published=result["published"] or None,
+                  venue=result["venue"] or None, citation_count=result["citation_count"])
+            for result in relevant[:config.LIBRARY_MAX_PAPERS]
         ]
+        return papers, len(relevant)
+
+
+# =============================================================================
+# Job Store
+# =============================================================================
+
+class JobStore:
+    """Write-through store for research jobs backed by the research_jobs table.
+
+    Pending and processing jobs form an in-memory hot set. Finished jobs move to
+    a bounded LRU, and anything older is read back from SQLite, so memory stays
+    flat regardless of uptime and results survive restarts.
+
+    Stage outputs are checkpointed in job_checkpoints. The ``request`` checkpoint
+    holds the job's submission parameters so it can be re-queued after a restart.
+    Other checkpoints of jobs finished more than ``checkpoint_retention_hours``
+    ago are pruned, so a later retry or re-run starts from the first stage.
+    """
+
+    LIVE_STATUSES = ("pending", "processing")
+    PRUNE_INTERVAL_SECONDS = 3600
+
+    def __init__(self, db: SQLiteDatabase, max_finished: int = config.FINISHED_JOBS_IN_MEMORY,
+                 checkpoint_retention_hours: float = config.CHECKPOINT_RETENTION_HOURS):
+        self.db = db
+        self._live: Dict[str, ResearchJob] = {}
+        self._finished = LRUTTLCache(max_entries=max_finished, sizeof=lambda key, value: 0)
+        self._lock = threading.Lock()
+        self.db_lookups = 0
+        self.checkpoint_retention_hours = checkpoint_retention_hours
+        self.checkpoints_pruned = 0
+        self._pruned_at: Optional[float] = None
+
+    def recover(self) -> List[Tuple[str, Dict]]:
+        """Reload jobs left pending/processing by a previous process.
+
+        Returns (job_id, request parameters) for each job that can be re-queued;
+        jobs without recorded parameters are marked failed.
+        """
+        rows = self.db.query_all(
+            "SELECT job_id FROM research_jobs WHERE status IN ('pending', 'processing')"
+        )
+        resumable = []
+        for (job_id,) in rows:
+            params = self.load_checkpoints(job_id).get("request")
+            if params is None:
+                self.mark_failed(job_id, "Interrupted by server restart")
+                continue
+            self.reopen(job_id)
+            resumable.append((job_id, params))
+
+        if rows:
+            logger.warning(f"⚠️ Recovered {len(resumable)} of {len(rows)} interrupted jobs")
+        return resumable
+
+    def create(self, job: ResearchJob, query_hash: Optional[str] = None, params: Optional[Dict] = None):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO research_jobs (job_id, status, query, query_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.status, job.query, query_hash, job.created_at.isoformat())
+            )
+            if params is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?)",
+                    (job.job_id, "request", json.dumps(params), datetime.now().isoformat())
+                )
+        with self._lock:
+            self._live[job.job_id] = job
+
+    def reopen(self, job_id: str) -> ResearchJob:
+        """Return a finished (or interrupted) job to the pending state"""
+        job = self.get(job_id)
+        self.db.execute(
+            "UPDATE research_jobs SET status = 'pending', completed_at = NULL, results = NULL, error = NULL "
+            "WHERE job_id = ?",
+            (job_id,)
+        )
+        job.status = "pending"
+        job.completed_at = None
+        job.results = None
+        job.error = None
+        self._finished.discard(job_id)
+        with self._lock:
+            self._live[job_id] = job
+        return job
+
+    def save_checkpoint(self, job_id: str, stage: str, output: Any):
+        self.db.execute(
+            "INSERT OR REPLACE INTO job_checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, stage, json.dumps(make_serializable(output)), datetime.now().isoformat())
+        )
+
+    def load_checkpoints(self, job_id: str) -> Dict[str, Any]:
+        rows = self.db.query_all("SELECT stage, output FROM job_checkpoints WHERE job_id = ?", (job_id,))
+        return {stage: json.loads(output) for stage, output in rows}
+
+    def clear_checkpoints(self, job_id: str, stages: List[str]) -> int:
+        """Delete the given stages' checkpoints, including per-item ones (``stage:n``)"""
+        with self.db.transaction() as conn:
+            return sum(
+                conn.execute(
+                    "DELETE FROM job_checkpoints WHERE job_id = ? AND (stage = ? OR stage LIKE ?)",
+                    (job_id, stage, f"{stage}:%")
+                ).rowcount
+                for stage in stages
+            )
+
+    def prune_checkpoints(self) -> int:
+        """Delete the stage checkpoints (all but ``request``) of jobs finished
+        more than ``checkpoint_retention_hours`` ago"""
+        cutoff = datetime.now() - timedelta(hours=self.checkpoint_retention_hours)
+        deleted = self.db.execute(
+            "DELETE FROM job_checkpoints WHERE stage != 'request' AND job_id IN ("
+            "SELECT job_id FROM research_jobs WHERE status IN ('completed', 'failed') AND completed_at < ?)",
+            (cutoff.isoformat(),)
+        ).rowcount
+        self._pruned_at = time.monotonic()
+        with self._lock:
+            self.checkpoints_pruned += deleted
+        if deleted:
+            logger.info(f"🧹 Pruned {deleted} checkpoints of jobs finished before {cutoff:%Y-%m-%d %H:%M}")
+        return deleted
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._lock:
+            job = self._live.get(job_id)
+        if job is not None:
+            return job
+
+        job = self._finished.get(job_id)
+        if job is not None:
+            return job
+
+        row = self.db.query_one(
+            "SELECT job_id, status, query, created_at, completed_at, results, error "
+            "FROM research_jobs WHERE job_id = ?",
+            (job_id,)
+        )
+        if row is None:
+            return None
+        self.db_lookups += 1
+
+        job_id, status, query, created_at, completed_at, results, error = row
+        job = ResearchJob(
+            job_id=job_id,
+            status=status,
+            query=query,
+            created_at=datetime.fromisoformat(created_at),
+            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+            results=json.loads(results) if results else None,
+            error=error
+        )
+        if status not in self.LIVE_STATUSES:
+            self._finished.set(job_id, job)
+        return job
+
+    def mark_processing(self, job_id: str):
+        job = self.get(job_id)
+        job.status = "processing"
+        self.db.execute("UPDATE research_jobs SET status = 'processing' WHERE job_id = ?", (job_id,))
+
+    def mark_completed(self, job_id: str, results: Dict):
+        job = self.get(job_id)
+        job.completed_at = datetime.now()
+        job.results = make_serializable(results)  # same shape whether served from memory or the DB
+        self.db.execute(
+            "UPDATE research_jobs SET status = 'completed', completed_at = ?, results = ? WHERE job_id = ?",
+            (job.completed_at.isoformat(), json.dumps(job.results), job_id)
+        )
+        job.status = "completed"
+        self._retire(job)
+
+    def mark_failed(self, job_id: str, error: str):
+        job = self.get(job_id)
+        job.completed_at = datetime.now()
+        job.error = error
+        self.db.execute(
+            "UPDATE research_jobs SET status = 'failed', completed_at = ?, error = ? WHERE job_id = ?",
+            (job.completed_at.isoformat(), error, job_id)
+        )
+        job.status = "failed"
+        self._retire(job)
+
+    def _retire(self, job: ResearchJob):
+        """Move a finished job from the hot set into the LRU"""
+        self._finished.set(job.job_id, job)
+        with self._lock:
+            self._live.pop(job.job_id, None)
+        if self._pruned_at is None or time.monotonic() - self._pruned_at >= self.PRUNE_INTERVAL_SECONDS:
+            self.prune_checkpoints()
+
+    def live_count(self) -> int:
+        with self._lock:
+            return len(self._live)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live": self.live_count(),
+            "finished_in_memory": len(self._finished),
+            "max_finished_in_memory": self._finished.max_entries,
+            "db_lookups": self.db_lookups,
+            "checkpoints_pruned": self.checkpoints_pruned
+        }
+
+
+# =============================================================================
+# Job Events (Server-Sent Events)
+# =============================================================================
+
+class JobEventBus:
+    """Per-job event history with async subscribers.
+
+    ``publish`` may be called from the event loop or from executor threads; events
+    are always dispatched on the loop. History is kept for the most recent
+    ``Config.EVENT_HISTORY_JOBS`` jobs so late subscribers get a full replay.
+    """
+
+    TERMINAL_EVENTS = ("completed", "failed")
+
+    def __init__(self, max_jobs: int = config.EVENT_HISTORY_JOBS):
+        self.max_jobs = max_jobs
+        self._history: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def publish(self, job_id: str, event: str, data: Optional[Dict] = None):
+        message = {"event": event, "data": data or {}}
+        if self._loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._dispatch(job_id, message)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, job_id, message)
+
+    def reset(self, job_id: str):
+        """Forget a job's history before it runs again"""
+        self._history.pop(job_id, None)
+
+    def has_history(self, job_id: str) -> bool:
+        return bool(self._history.get(job_id))
+
+    def _dispatch(self, job_id: str, message: Dict):
+        history = self._history.setdefault(job_id, [])
+        self._history.move_to_end(job_id)
+        history.append(message)
+        while len(self._history) > self.max_jobs:
+            self._history.popitem(last=False)
+
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Optional[Dict]]:
+        """Replay history, then yield live events until a terminal event.
+
+        Yields ``None`` every ``Config.SSE_KEEPALIVE_SECONDS`` without events.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for message in self._history.get(job_id, []):
+            queue.put_nowait(message)
+        self._subscribers.setdefault(job_id, []).append(queue)
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=config.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield message
+                if message["event"] in self.TERMINAL_EVENTS:
+                    return
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
 
 
 # =============================================================================
@@ -592,58 +2484,226 @@ class MemoryManager:
 class ResearchMateAgent:
     """Main agent with two-step workflow and caching"""
 
-    def __init__(self):
-        self.llm = LocalLLMClient()
+    STAGES = ("discover", "store", "analyze", "classify", "synthesize")
+
+    def __init__(self, lazy: Optional[bool] = None):
+        self.llm = LocalLLMClient(connect=False)
         self.memory = MemoryManager()
         self.tools = ResearchTools(self.llm, self.memory)
-        self.active_jobs: Dict[str, ResearchJob] = {}
+        self.jobs = JobStore(self.memory.db)
+        self.inflight_queries: Dict[str, str] = {}  # query hash -> running job_id
+        self.deduplicated_queries = 0
+        self._stats_lock = threading.Lock()
+        self.events = JobEventBus()
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.JOB_EXECUTOR_WORKERS,
+            thread_name_prefix="research-job"
+        )
+        self.warmed_up = threading.Event()
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_error: Optional[str] = None
+        if not (config.LAZY_STARTUP if lazy is None else lazy):
+            self.warm_up()
+
+    def warm_up(self):
+        """Load the embedding model and Chroma, probe the LLM servers and warm the
+        completion cache. Runs in the background after startup in lazy mode."""
+        start = time.perf_counter()
+        try:
+            self.memory.load()
+            self.llm.connect()
+        except Exception as e:
+            # Components that failed are retried on first use
+            self.warmup_error = str(e)
+            logger.error(f"❌ Warm-up failed: {e}")
+            return
+        self.warmup_seconds = time.perf_counter() - start
+        self.warmup_error = None
+        self.warmed_up.set()
+        logger.info(f"🚀 Warm-up complete in {self.warmup_seconds:.2f}s")
+
+    def readiness(self) -> Dict[str, Any]:
+        """Ready once every lazy component is loaded (by the warm-up or on first
+        use) and every model tier (or its fallback) has a server that passed a
+        health probe"""
+        llm_tiers = {name: any(endpoint.healthy for endpoint in self.llm.tier(name).router.endpoints)
+                     for name in self.llm.tiers}
+        loaded = all(component.loaded for component in self.memory.components.values())
+        return {
+            "ready": loaded and all(llm_tiers.values()),
+            "warmed_up": self.warmed_up.is_set(),
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "warmup_error": self.warmup_error,
+            "components": {
+                name: {"loaded": component.loaded,
+                       "load_seconds": round(component.load_seconds, 3)
+                       if component.load_seconds is not None else None}
+                for name, component in self.memory.components.items()
+            },
+            "llm_tiers": llm_tiers
+        }
 
-    async def execute_research(self, job_id: str, query: str, classification_focus: str = "methodology") -> Dict:
-        """Execute two-step research workflow: Find → Classify/Analyze"""
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking stage on the job executor, keeping the event loop free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def attach_inflight_query(self, query: str) -> Optional[str]:
+        """Return the job already running this query, if any (single-flight)"""
+        job_id = self.inflight_queries.get(self.memory.get_query_hash(query))
+        job = self.jobs.get(job_id) if job_id else None
+        if job and job.status in JobStore.LIVE_STATUSES:
+            with self._stats_lock:
+                self.deduplicated_queries += 1
+            return job_id
+        return None
+
+    def register_inflight_query(self, query: str, job_id: str):
+        self.inflight_queries[self.memory.get_query_hash(query)] = job_id
+
+    async def _stage(self, job_id: str, stage: str, checkpoints: Dict[str, Any], func, *args, **kwargs):
+        """Return ``stage``'s checkpointed output, or run it and checkpoint the result.
+
+        Outputs are returned in serialized (JSON) form either way.
+        """
+        resumed = stage in checkpoints
+        self.events.publish(job_id, "stage", {"stage": stage, "resumed": resumed})
+        if resumed:
+            return checkpoints[stage]
+
+        output = make_serializable(await self._run_blocking(func, *args, **kwargs))
+        await self._run_blocking(self.jobs.save_checkpoint, job_id, stage, output)
+        return output
+
+    def _analyze_resumable(self, job_id: str, papers: List[Paper], focus: str,
+                           checkpoints: Dict[str, Any]) -> List[Tuple[str, Optional[Dict], float]]:
+        """Analyze stage with one checkpoint per paper (``analyze:<index>``).
+
+        Only papers without a successful checkpoint are sent to the LLM, so a job
+        interrupted mid-stage resumes with the remaining papers. Classifications
+        are returned in serialized form.
+        """
+        done = {
+            int(stage.split(":", 1)[1]): (output["analysis"], output.get("classification"), output["latency"])
+            for stage, output in checkpoints.items() if stage.startswith("analyze:")
+        }
+        pending = [index for index in range(len(papers)) if index not in done]
+
+        def on_result(batch_index: int, paper: Paper, analysis: str,
+                      classification: Optional[Classification], latency: float):
+            index = pending[batch_index]
+            if not analysis.startswith("Analysis failed"):
+                self.jobs.save_checkpoint(job_id, f"analyze:{index}", {
+                    "analysis": analysis,
+                    "classification": make_serializable(classification),
+                    "latency": latency
+                })
+            self.events.publish(job_id, "paper_analysis",
+                                {"index": index, "title": paper.title, "analysis": analysis,
+                                 "classification": make_serializable(classification),
+                                 "latency": round(latency, 3)})
+
+        fresh = self.tools.analyze_paper_batch_timed(
+            [papers[index] for index in pending], focus, on_result=on_result
+        )
+        done.update(
+            (index, (analysis, make_serializable(classification), latency))
+            for index, (analysis, classification, latency) in zip(pending, fresh)
+        )
+        return [done[index] for index in range(len(papers))]
+
+    async def execute_research(self, job_id: str, query: str, classification_focus: str = "methodology",
+                               cache_threshold: Optional[float] = None, use_cache: bool = True,
+                               use_library: Optional[bool] = None) -> Dict:
+        """Execute the research pipeline: discover → store → analyze → classify → synthesize.
+
+        Discovery first tries the local paper library (``use_library``, default
+        Config.LIBRARY_FIRST) and only queries remote sources when too few stored
+        papers are relevant. Each stage's output is checkpointed, so a retried,
+        re-run or restarted job resumes after its last completed stage.
+        """
+        use_library = config.LIBRARY_FIRST if use_library is None else use_library
         try:
-            self.active_jobs[job_id].status = "processing"
+            await self._run_blocking(self.jobs.mark_processing, job_id)
             logger.info(f"🔍 Starting research for: {query}")
 
-            # Check cache first
-            cached_result = self.memory.check_query_cache(query)
-            if cached_result:
-                self.active_jobs[job_id].status = "completed"
-                self.active_jobs[job_id].completed_at = datetime.now()
-                self.active_jobs[job_id].results = cached_result
-                return cached_result
-
-            # Step 1: Find Papers (multi-source)
+            checkpoints = await self._run_blocking(self.jobs.load_checkpoints, job_id)
+            completed_stages = [stage for stage in self.STAGES if stage in checkpoints]
+            if completed_stages:
+                logger.info(f"⏩ Resuming job {job_id} after: {', '.join(completed_stages)}")
+            elif use_cache:
+                # Check cache first (exact, then semantically similar queries)
+                self.events.publish(job_id, "stage", {"stage": "cache_lookup"})
+                cached_result = await self._run_blocking(self.memory.find_cached_result, query, cache_threshold)
+                if cached_result:
+                    await self._run_blocking(self.jobs.mark_completed, job_id, cached_result)
+                    self.events.publish(job_id, "completed", {"job_id": job_id, "cached": True})
+                    return cached_result
+
+            # Step 1: Find Papers (local library first, else all remote sources
+            # concurrently, deduplicated on arrival)
             logger.info("📚 Step 1: Finding papers...")
-            arxiv_papers = self.tools.search_arxiv(query, max_results=3)
-            s2_papers = self.tools.search_semantic_scholar(query, max_results=3)
 
-            # Combine and deduplicate
-            all_papers = arxiv_papers + s2_papers
-            if not all_papers:
-                raise Exception("No papers found for query")
+            def discover():
+                report = {}
+                if use_library:
+                    start = time.perf_counter()
+                    papers, relevant = self.memory.find_library_papers(query)
+                    report["library"] = {"status": "ok" if papers else "insufficient", "papers": len(papers),
+                                         "relevant": relevant, "latency": round(time.perf_counter() - start, 3)}
+                    if papers:
+                        logger.info(f"📚 Answering from the local library ({relevant} relevant papers)")
+                        return {"papers": papers, "sources": report}
+
+                papers, remote_report = self.tools.discover_papers(query, max_results=3)
+                report.update(remote_report)
+                if not papers:
+                    raise Exception("No papers found for query")
+                return {"papers": papers, "sources": report}
+
+            discovered = await self._stage(job_id, "discover", checkpoints, discover)
+            all_papers = [Paper(**paper) for paper in discovered["papers"]]
+            discovery_report = discovered["sources"]
+
+            self.events.publish(job_id, "papers_found", {
+                "count": len(all_papers),
+                "titles": [paper.title for paper in all_papers],
+                "sources": discovery_report
+            })
 
             # Store papers
-            paper_ids = []
-            for paper in all_papers:
-                paper_id = self.memory.store_paper(paper)
-                paper_ids.append(paper_id)
+            await self._stage(job_id, "store", checkpoints, self.memory.store_papers, all_papers)
 
-            # Step 2: Classify and Analyze
+            # Step 2: Analyze and Classify
             logger.info("🔬 Step 2: Analyzing papers...")
 
-            # Batch classification
-            classifications = self.tools.classify_papers(all_papers)
+            # Individual analysis with classification in the same call (concurrent
+            # across LLM slots), streamed and checkpointed per paper
+            self.events.publish(job_id, "stage", {"stage": "analyze"})
+            timed_analyses = await self._run_blocking(
+                self._analyze_resumable, job_id, all_papers, classification_focus, checkpoints
+            )
+            analyses = [analysis for analysis, _, _ in timed_analyses]
+            latencies = [latency for _, _, latency in timed_analyses]
 
-            # Individual analysis
-            analyses = self.tools.analyze_paper_batch(all_papers, classification_focus)
+            # Classifications come with the analyses; only gaps cost an LLM call
+            classifications = await self._stage(
+                job_id, "classify", checkpoints, self.tools.classify_analyzed,
+                all_papers, [classification for _, classification, _ in timed_analyses]
+            )
 
-            # Synthesis
-            synthesis = self.synthesize_findings(query, analyses, all_papers)
+            # Synthesis, streamed token by token
+            synthesis = await self._stage(
+                job_id, "synthesize", checkpoints,
+                self.synthesize_findings, query, analyses, all_papers,
+                on_token=lambda token: self.events.publish(job_id, "synthesis_token", {"text": token})
+            )
 
             # Compile results
             results = {
                 "query": query,
                 "papers_found": len(all_papers),
+                "sources": discovery_report,
                 "papers": [
                     {
                         "title": paper.title,
@@ -652,49 +2712,194 @@ class ResearchMateAgent:
                         "published": paper.published,
                         "citation_count": paper.citation_count,
                         "url": paper.paper_url,
-                        "analysis": analyses[i] if i < len(analyses) else "Analysis failed"
+                        "analysis": analyses[i] if i < len(analyses) else "Analysis failed",
+                        "analysis_latency": round(latencies[i], 3) if i < len(latencies) else None,
+                        # Parsed relevance score (1-10), for ranking
+                        "relevance": (classifications.get(f"paper_{i + 1}") or {}).get("relevance")
                     }
                     for i, paper in enumerate(all_papers)
                 ],
                 "classifications": classifications,
                 "synthesis": synthesis,
-                "processing_time": (datetime.now() - self.active_jobs[job_id].created_at).total_seconds()
+                "processing_time": (datetime.now() - self.jobs.get(job_id).created_at).total_seconds()
             }
 
             # Cache results
-            self.memory.store_query_result(query, results)
+            await self._run_blocking(self.memory.store_query_result, query, results)
 
             # Update job
-            self.active_jobs[job_id].status = "completed"
-            self.active_jobs[job_id].completed_at = datetime.now()
-            self.active_jobs[job_id].results = results
+            await self._run_blocking(self.jobs.mark_completed, job_id, results)
 
             logger.info(f"✅ Research completed for: {query}")
+            self.events.publish(job_id, "completed", {
+                "job_id": job_id,
+                "processing_time": results["processing_time"]
+            })
             return results
 
         except Exception as e:
             logger.error(f"❌ Research failed: {e}")
-            self.active_jobs[job_id].status = "failed"
-            self.active_jobs[job_id].error = str(e)
+            await self._run_blocking(self.jobs.mark_failed, job_id, str(e))
+            self.events.publish(job_id, "failed", {"job_id": job_id, "error": str(e)})
             raise e
 
-    def synthesize_findings(self, query: str, analyses: List[str], papers: List[Paper]) -> str:
-        """Synthesize findings with paper metadata"""
-        try:
-            # Filter successful analyses
-            valid_analyses = [a for a in analyses if not a.startswith("Analysis failed")]
+        finally:
+            query_hash = self.memory.get_query_hash(query)
+            if self.inflight_queries.get(query_hash) == job_id:
+                del self.inflight_queries[query_hash]
+
+    def synthesize_findings(self, query: str, analyses: List[str], papers: List[Paper],
+                            on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Synthesize findings with paper metadata (streamed to ``on_token`` if given).
+
+        When the analyses do not fit one context window they are synthesized in
+        groups first (map), and the partial syntheses are merged (reduce) until
+        a single prompt fits; only that final prompt is streamed. Raises
+        LLMError when a call fails, failing the stage.
+        """
+        # Filter successful analyses
+        valid = [(i + 1, a) for i, a in enumerate(analyses) if not a.startswith("Analysis failed")]
+
+        if not valid:
+            return "Unable to synthesize - no successful analyses"
+
+        tier = config.STEP_MODEL_TIERS["synthesize"]
+        packer = self.tools.packers[tier]
+        max_tokens = config.SYNTHESIS_MAX_TOKENS
+        texts = [analysis for _, analysis in valid]
+        spans = [(number, number) for number, _ in valid]  # paper numbers each text covers
+        heading = "Paper Analyses"
+
+        while True:
+            labels = [f"Paper {a}" if a == b else f"Papers {a}-{b}" for a, b in spans]
+            fixed = packer.count_tokens(PromptTemplates.get_synthesis_prompt(query, [], heading=heading))
+            item_limit = packer.item_budget(fixed, max_tokens)
+            texts = [packer.fit_text(text, item_limit) for text in texts]
+            batches = packer.pack(texts, fixed, max_tokens)
+            if len(batches) == 1:
+                break
+            if heading != "Paper Analyses" and len(batches) == len(texts):
+                # Partial syntheses no longer shrink: share the window evenly
+                texts = [packer.fit_text(text, item_limit // len(texts)) for text in texts]
+                break
+
+            logger.info(f"🧩 {len(texts)} items exceed one context window - synthesizing {len(batches)} groups")
+
+            def synthesize_group(batch: List[int]) -> str:
+                prompt = PromptTemplates.get_synthesis_prompt(
+                    query, [texts[i] for i in batch], [labels[i] for i in batch], heading
+                )
+                return self.llm.generate(prompt, max_tokens=max_tokens, temperature=0.4,
+                                         slot_key="synthesis", tier=tier)
 
-            if not valid_analyses:
-                return "Unable to synthesize - no successful analyses"
+            texts = map_bounded(self.tools.llm_executor, synthesize_group, batches, self.llm.tier(tier).total_slots)
+            spans = [(spans[batch[0]][0], spans[batch[-1]][1]) for batch in batches]
+            heading = "Partial Syntheses"
 
-            prompt = PromptTemplates.get_synthesis_prompt(query, valid_analyses)
-            synthesis = self.llm.generate(prompt, max_tokens=400, temperature=0.4)
+        prompt = PromptTemplates.get_synthesis_prompt(query, texts, labels, heading)
+        if on_token:
+            synthesis = self.llm.generate_stream(prompt, on_token, max_tokens=max_tokens, temperature=0.4,
+                                                 slot_key="synthesis", tier=tier)
+        else:
+            synthesis = self.llm.generate(prompt, max_tokens=max_tokens, temperature=0.4,
+                                          slot_key="synthesis", tier=tier)
 
-            return synthesis
+        return synthesis
 
-        except Exception as e:
-            logger.error(f"Synthesis failed: {e}")
-            return f"Synthesis failed: {e}"
+
+# =============================================================================
+# Job Scheduling
+# =============================================================================
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class JobScheduler:
+    """Bounded priority queue of research jobs drained by a fixed worker pool.
+
+    Admission control happens in ``submit``: once ``max_queued`` jobs are waiting,
+    new jobs are rejected instead of piling more load onto the LLM server.
+    """
+
+    PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+    def __init__(self, run_job, num_workers: int = config.JOB_WORKERS,
+                 max_queued: int = config.MAX_QUEUED_JOBS):
+        self.run_job = run_job
+        self.num_workers = num_workers
+        self.max_queued = max_queued
+        self._queue: List[Tuple[int, int, str, Dict]] = []  # heap of (priority, seq, job_id, kwargs)
+        self._seq = itertools.count()
+        self._available: Optional[asyncio.Semaphore] = None
+        self._workers: List[asyncio.Task] = []
+        self.running: Dict[str, float] = {}  # job_id -> start time
+        self.avg_job_seconds = float(config.JOB_ETA_INITIAL_SECONDS)
+
+    async def start(self):
+        """Start the worker tasks (call from the running event loop)"""
+        self._available = asyncio.Semaphore(len(self._queue))
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.num_workers)]
+        logger.info(f"🧵 Job scheduler started with {self.num_workers} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job_id: str, priority: str = "normal", **kwargs):
+        """Queue a job, or raise QueueFullError when at capacity"""
+        if len(self._queue) >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} queued)")
+
+        heapq.heappush(self._queue, (self.PRIORITIES[priority], next(self._seq), job_id, kwargs))
+        if self._available is not None:
+            self._available.release()
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs, or None if not queued"""
+        for position, entry in enumerate(sorted(self._queue), start=1):
+            if entry[2] == job_id:
+                return position
+        return None
+
+    def eta_seconds(self, job_id: str) -> Optional[float]:
+        """Estimated seconds until the job completes"""
+        if job_id in self.running:
+            elapsed = time.monotonic() - self.running[job_id]
+            return round(max(0.0, self.avg_job_seconds - elapsed), 1)
+
+        position = self.queue_position(job_id)
+        if position is None:
+            return None
+        # Jobs ahead (queued + running) drain num_workers at a time
+        rounds = (position - 1 + len(self.running)) // self.num_workers
+        return round((rounds + 1) * self.avg_job_seconds, 1)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self._queue),
+            "running": len(self.running),
+            "workers": self.num_workers,
+            "capacity": self.max_queued,
+            "avg_job_seconds": round(self.avg_job_seconds, 1)
+        }
+
+    async def _worker(self, worker_id: int):
+        while True:
+            await self._available.acquire()
+            _, _, job_id, kwargs = heapq.heappop(self._queue)
+
+            self.running[job_id] = time.monotonic()
+            try:
+                await self.run_job(job_id, **kwargs)
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: job {job_id} failed: {e}")
+            finally:
+                duration = time.monotonic() - self.running.pop(job_id)
+                # Exponentially weighted moving average of job duration for ETAs
+                self.avg_job_seconds = 0.8 * self.avg_job_seconds + 0.2 * duration
 
 
 # =============================================================================
@@ -708,6 +2913,45 @@ app = FastAPI(
 )
 
 agent = ResearchMateAgent()
+scheduler = JobScheduler(agent.execute_research)
+
+
+@app.on_event("startup")
+async def startup_event():
+    agent.events.bind_loop(asyncio.get_running_loop())
+    if not agent.warmed_up.is_set():
+        # Lazy startup: serve right away, load heavy components in the background
+        asyncio.get_running_loop().run_in_executor(agent.executor, agent.warm_up)
+
+    # Jobs interrupted by the last shutdown resume from their checkpoints
+    for job_id, params in agent.jobs.recover():
+        try:
+            submit_job(job_id, params)
+        except HTTPException:
+            agent.jobs.mark_failed(job_id, "Interrupted by server restart (queue full)")
+            continue
+        agent.register_inflight_query(params["query"], job_id)
+
+    await scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.stop()
+    agent.memory.db.close()
+
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving (no dependencies checked)"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Ready for research jobs: warm-up done and the LLM servers reachable (503 otherwise)"""
+    status = agent.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
 
 @app.get("/")
@@ -715,102 +2959,224 @@ async def root():
     return {
         "message": "ResearchMate Agent v2.0 is running",
         "status": "healthy",
-        "llm_server": config.LLAMA_SERVER_URL,
+        "llm_server": agent.llm.server_url,
+        "llm_servers": {name: [endpoint.url for endpoint in tier.router.endpoints]
+                        for name, tier in agent.llm.tiers.items()},
         "cache_size": len(agent.llm.cache),
-        "active_jobs": len(agent.active_jobs)
+        "active_jobs": agent.jobs.live_count(),
+        "queue": scheduler.stats()
+    }
+
+
+def submit_job(job_id: str, params: Dict, use_cache: bool = True):
+    """Queue a job from its request parameters (429 when the queue is full)"""
+    try:
+        scheduler.submit(
+            job_id,
+            params.get("priority", "normal"),
+            query=params["query"],
+            classification_focus=params["classification_focus"],
+            cache_threshold=params.get("cache_threshold"),
+            use_cache=use_cache,
+            use_library=params.get("use_library")
+        )
+    except QueueFullError as e:
+        retry_after = int(scheduler.avg_job_seconds * scheduler.max_queued / scheduler.num_workers)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(retry_after)})
+
+
+# Serializes job admission (new, retried and re-run jobs): the job store is
+# written from the threadpool, so without it two requests could both pass the
+# in-flight/status checks before either one's write lands
+admission_lock = asyncio.Lock()
+
+
+async def requeue_job(job_id: str, from_stage: Optional[str] = None) -> Dict:
+    """Re-queue a finished job, resuming from its checkpoints.
+
+    With ``from_stage``, that stage and every later one are discarded and
+    recomputed; earlier stages are reused. Database work runs in the threadpool;
+    the scheduler and event bus are only touched from the event loop, and only
+    once the job is pending with its checkpoints cleared.
+    """
+    async with admission_lock:
+        job = await run_in_threadpool(agent.jobs.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status in JobStore.LIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Job status: {job.status}")
+
+        checkpoints = await run_in_threadpool(agent.jobs.load_checkpoints, job_id)
+        params = checkpoints.get("request")
+        if params is None:
+            raise HTTPException(status_code=409, detail="Job has no recorded request parameters")
+
+        if from_stage:
+            stages = list(ResearchMateAgent.STAGES[ResearchMateAgent.STAGES.index(from_stage):])
+            await run_in_threadpool(agent.jobs.clear_checkpoints, job_id, stages)
+        await run_in_threadpool(agent.jobs.reopen, job_id)
+        agent.events.reset(job_id)
+        try:
+            submit_job(job_id, params, use_cache=False)
+        except HTTPException:
+            await run_in_threadpool(agent.jobs.mark_failed, job_id, "Not re-queued (queue full)")
+            raise
+        agent.register_inflight_query(params["query"], job_id)
+
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "message": f"Re-running from stage: {from_stage}" if from_stage else "Retrying from last checkpoint",
+        "queue_position": scheduler.queue_position(job_id),
+        "eta_seconds": scheduler.eta_seconds(job_id)
     }
 
 
 @app.post("/research/query")
-async def start_research(request: ResearchQuery, background_tasks: BackgroundTasks):
-    """Start async research job"""
-    job_id = str(uuid.uuid4())
-
-    job = ResearchJob(
-        job_id=job_id,
-        status="pending",
-        query=request.query,
-        created_at=datetime.now()
-    )
+async def start_research(request: ResearchQuery):
+    """Queue an async research job (429 when the queue is full)"""
+    if request.priority not in JobScheduler.PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"priority must be one of {list(JobScheduler.PRIORITIES)}"
+        )
 
-    agent.active_jobs[job_id] = job
+    async with admission_lock:
+        # Identical query already queued or running: attach to that job
+        existing_job_id = await run_in_threadpool(agent.attach_inflight_query, request.query)
+        if existing_job_id:
+            existing_job = await run_in_threadpool(agent.jobs.get, existing_job_id)
+            return {
+                "job_id": existing_job_id,
+                "status": existing_job.status,
+                "message": "Attached to identical in-flight research job",
+                "deduplicated": True,
+                "queue_position": scheduler.queue_position(existing_job_id),
+                "eta_seconds": scheduler.eta_seconds(existing_job_id)
+            }
 
-    # Start background task
-    background_tasks.add_task(
-        agent.execute_research,
-        job_id,
-        request.query,
-        request.classification_focus
-    )
+        job_id = str(uuid.uuid4())
+
+        job = ResearchJob(
+            job_id=job_id,
+            status="pending",
+            query=request.query,
+            created_at=datetime.now()
+        )
+        params = {
+            "query": request.query,
+            "classification_focus": request.classification_focus,
+            "cache_threshold": request.cache_threshold,
+            "use_library": request.use_library,
+            "priority": request.priority
+        }
+
+        # Recorded before it is queued, so a worker never picks up an unknown job
+        await run_in_threadpool(agent.jobs.create, job, agent.memory.get_query_hash(request.query), params)
+        try:
+            submit_job(job_id, params)
+        except HTTPException:
+            await run_in_threadpool(agent.jobs.mark_failed, job_id, "Not queued (queue full)")
+            raise
+        agent.register_inflight_query(request.query, job_id)
 
     return {
         "job_id": job_id,
         "status": "pending",
-        "message": "Research started",
-        "estimated_time": "30-60 seconds"
+        "message": "Research queued",
+        "queue_position": scheduler.queue_position(job_id),
+        "eta_seconds": scheduler.eta_seconds(job_id)
     }
 
 
+@app.post("/research/retry/{job_id}")
+async def retry_research(job_id: str):
+    """Re-queue a failed job; completed stages are not repeated"""
+    job = await run_in_threadpool(agent.jobs.get, job_id)
+    if job is not None and job.status == "completed":
+        raise HTTPException(status_code=409, detail="Job already completed")
+    return await requeue_job(job_id)
+
+
+@app.post("/research/rerun/{job_id}/{stage}")
+async def rerun_stage(job_id: str, stage: str):
+    """Re-run one pipeline stage (and the stages that consume its output)"""
+    if stage not in ResearchMateAgent.STAGES:
+        raise HTTPException(status_code=400, detail=f"stage must be one of {list(ResearchMateAgent.STAGES)}")
+    return await requeue_job(job_id, stage)
+
+
 @app.get("/research/status/{job_id}")
 async def get_status(job_id: str):
     """Get job status"""
-    if job_id not in agent.active_jobs:
+    job = await run_in_threadpool(agent.jobs.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = agent.active_jobs[job_id]
     return {
         "job_id": job_id,
         "status": job.status,
         "created_at": job.created_at,
         "completed_at": job.completed_at,
-        "error": job.error
+        "error": job.error,
+        "queue_position": scheduler.queue_position(job_id),
+        "eta_seconds": scheduler.eta_seconds(job_id)
     }
 
 
+@app.get("/research/stream/{job_id}")
+async def stream_job(job_id: str):
+    """Stream job progress as Server-Sent Events.
+
+    Events: stage, papers_found, paper_analysis, synthesis_token, and finally
+    completed or failed. Past events are replayed on connect.
+    """
+    job = await run_in_threadpool(agent.jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_source():
+        if job.status in JobEventBus.TERMINAL_EVENTS and not agent.events.has_history(job_id):
+            # Finished before its history was recorded (or history evicted)
+            yield f"event: {job.status}\ndata: {json.dumps({'job_id': job_id, 'error': job.error})}\n\n"
+            return
+
+        async for message in agent.events.subscribe(job_id):
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/research/results/{job_id}")
-async def get_results(job_id: str):
+def get_results(job_id: str):
     """Get job results"""
-    if job_id not in agent.active_jobs:
+    job = agent.jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = agent.active_jobs[job_id]
-
     if job.status != "completed":
         raise HTTPException(status_code=400, detail=f"Job status: {job.status}")
 
     return job.results
 
 @app.get("/research/markdown/{job_id}")
-async def get_results_markdown(job_id: str):
+def get_results_markdown(job_id: str):
     """Get job results formatted as markdown"""
-    # Check active jobs first
-    if job_id in agent.active_jobs:
-        job = agent.active_jobs[job_id]
-
-        if job.status != "completed":
-            raise HTTPException(status_code=400, detail=f"Job status: {job.status}")
-
-        results = job.results
-    else:
-        # Check database for completed jobs
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        cursor = conn.execute(
-            "SELECT status, results FROM research_jobs WHERE job_id = ?",
-            (job_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
-
-        if not row:
-            raise HTTPException(status_code=404, detail="Job not found")
-
-        status, results_str = row
-        if status != "completed":
-            raise HTTPException(status_code=400, detail=f"Job status: {status}")
+    job = agent.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-        results = json.loads(results_str)
+    if job.status != "completed":
+        raise HTTPException(status_code=400, detail=f"Job status: {job.status}")
 
-    markdown = generate_markdown_report(results)
+    markdown = generate_markdown_report(job.results)
 
     return {"job_id": job_id, "markdown": markdown}
 
@@ -851,6 +3217,8 @@ def generate_markdown_report(results: Dict) -> str:
             md.append(f"**Citations:** {paper['citation_count']}")
         if paper.get('url'):
             md.append(f"**URL:** {paper['url']}")
+        if paper.get('relevance'):
+            md.append(f"**Relevance:** {paper['relevance']}/10")
 
         md.append("")
         md.append("**Analysis:**")
@@ -865,7 +3233,12 @@ def generate_markdown_report(results: Dict) -> str:
         md.append("")
         for paper_key, classification in results['classifications'].items():
             paper_num = paper_key.split('_')[1]
-            md.append(f"**Paper {paper_num}:** {classification['category']} (confidence: {classification['confidence']:.1f})")
+            details = [f"confidence: {classification['confidence']:.1f}"]
+            if classification.get('quality'):
+                details.append(f"quality: {classification['quality']}")
+            if classification.get('relevance'):
+                details.append(f"relevance: {classification['relevance']}/10")
+            md.append(f"**Paper {paper_num}:** {classification['category']} ({', '.join(details)})")
         md.append("")
 
     # Footer
@@ -874,47 +3247,83 @@ def generate_markdown_report(results: Dict) -> str:
 
     return "\n".join(md)
 
+@app.get("/library/search")
+def search_library(query: str, limit: int = Query(10, ge=1, le=100), mode: SearchMode = "hybrid",
+                   venue: Optional[str] = None, year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   min_citations: Optional[int] = None, cursor: Optional[str] = None):
+    """Search the stored papers: BM25 + vector retrieval fused by reciprocal rank.
+
+    Pass the response's ``next_cursor`` as ``cursor`` (with the same query,
+    mode and filters) for the next page.
+    """
+    filters = LibraryFilters(venue=venue, year_from=year_from, year_to=year_to, min_citations=min_citations)
+    scope = search_scope(query, filters, mode)
+    try:
+        offset = decode_cursor(cursor, scope) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = time.perf_counter()
+    results = agent.memory.search_library(query, n_results=limit + 1, filters=filters, mode=mode, offset=offset)
+    return {
+        "query": query,
+        "mode": mode,
+        "filters": filters.model_dump(exclude_none=True),
+        "count": min(len(results), limit),
+        "library_size": agent.memory.library_size(),
+        "latency": round(time.perf_counter() - start, 3),
+        "results": results[:limit],
+        "next_cursor": encode_cursor(offset + limit, scope) if len(results) > limit else None
+    }
+
+
 @app.get("/stats")
-async def get_stats():
+def get_stats():
     """Get system stats"""
-    conn = sqlite3.connect(config.DATABASE_PATH)
+    db = agent.memory.db
 
     # Job stats
-    job_stats = conn.execute("""
+    job_stats = db.query_all("""
                              SELECT status, COUNT(*) as count
                              FROM research_jobs
                              GROUP BY status
-                             """).fetchall()
+                             """)
 
     # Cache stats
-    cache_stats = conn.execute("""
+    cache_stats = db.query_one("""
                                SELECT COUNT(*)       as cached_queries,
                                       SUM(hit_count) as total_hits
                                FROM query_cache
-                               """).fetchone()
-
-    conn.close()
+                               """)
 
     return {
         "jobs": dict(job_stats),
         "cache": {
             "llm_cache_size": len(agent.llm.cache),
+            "llm_cache": agent.llm.cache.stats(),
+            "persistent_llm_cache": agent.llm.persistent_cache.stats() if agent.llm.persistent_cache else None,
             "query_cache_size": cache_stats[0] if cache_stats else 0,
-            "total_cache_hits": cache_stats[1] if cache_stats else 0
+            "total_cache_hits": cache_stats[1] if cache_stats else 0,
+            "query_cache": agent.memory.get_query_cache_stats(),
+            "embedding_cache": agent.memory.get_embedding_cache_stats()
         },
-        "papers_stored": agent.memory.papers_collection.count()
+        "llm_tiers": agent.llm.tier_stats(),
+        "llm_endpoints": [stats for router in agent.llm.routers() for stats in router.stats()],
+        "papers_stored": agent.memory.papers_collection.count(),
+        "deduplication": {
+            "llm_prompts": agent.llm.inflight.stats(),
+            "queries": agent.deduplicated_queries
+        },
+        "queue": scheduler.stats(),
+        "job_store": agent.jobs.stats()
     }
 
 
 @app.delete("/cache/clear")
-async def clear_cache():
+def clear_cache():
     """Clear all caches"""
-    agent.llm.cache.clear()
-
-    conn = sqlite3.connect(config.DATABASE_PATH)
-    conn.execute("DELETE FROM query_cache")
-    conn.commit()
-    conn.close()
+    agent.llm.clear_cache()
+    agent.memory.clear_query_cache()
 
     return {"message": "Caches cleared"}
 
@@ -0,0 +1,149 @@
+"""
+SQLite persistence layer for ResearchMate
+
+- One long-lived connection per thread instead of connect/close per statement,
+  so sqlite3's per-connection prepared-statement cache is actually reused;
+  it is closed when its thread exits
+- WAL journal mode: readers no longer block on a writer (or vice versa)
+- Deferred writes (counters and other non-critical updates) are buffered and
+  flushed in a single transaction
+"""
+
+import logging
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteDatabase:
+    """Thread-safe access to one SQLite file through per-thread connections"""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, cached_statements: int = 256,
+                 flush_interval: float = 1.0, max_deferred: int = 500):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.max_deferred = max_deferred
+
+        self._local = threading.local()
+        self._connections: Set[sqlite3.Connection] = set()
+        self._connections_lock = threading.Lock()
+
+        self._deferred: List[Tuple[str, Sequence[Any]]] = []
+        self._deferred_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval,),
+            name=f"sqlite-flush-{path}", daemon=True
+        )
+
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._flusher.start()
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, created on first use"""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                cached_statements=self.cached_statements,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            holder = _ConnectionHolder(conn)
+            # The thread-local holder is dropped when its thread exits, which
+            # closes the connection - short-lived threads must not leak them
+            weakref.finalize(holder, self._release, conn)
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.add(conn)
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._connections_lock:
+            if conn not in self._connections:
+                return  # already closed by close()
+            self._connections.discard(conn)
+        conn.close()
+
+    def open_connections(self) -> int:
+        with self._connections_lock:
+            return len(self._connections)
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def query_all(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Run one write statement in its own transaction"""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> sqlite3.Cursor:
+        """Run a write statement for many rows in one transaction"""
+        with self.transaction() as conn:
+            return conn.executemany(sql, seq_of_params)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Commit on success, roll back on error"""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def defer(self, sql: str, params: Sequence[Any] = ()):
+        """Queue a non-critical write; flushed in batches by a background thread"""
+        with self._deferred_lock:
+            self._deferred.append((sql, params))
+            should_flush = len(self._deferred) >= self.max_deferred
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all deferred statements in one transaction"""
+        with self._deferred_lock:
+            pending, self._deferred = self._deferred, []
+        if not pending:
+            return 0
+
+        try:
+            with self.transaction() as conn:
+                for sql, params in pending:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.error(f"Deferred write flush failed ({len(pending)} statements): {e}")
+            return 0
+        return len(pending)
+
+    def _flush_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+
+
+class _ConnectionHolder:
+    """Thread-local owner of a connection (sqlite3.Connection is not weak-referenceable)"""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
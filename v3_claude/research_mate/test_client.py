@@ -32,6 +32,33 @@ class ResearchMateClient:
         response = requests.get(f"{self.base_url}/research/results/{job_id}")
         return response.json()
 
+    def stream_events(self, job_id: str):
+        """Yield (event, data) pairs from the job's Server-Sent Events stream"""
+        response = requests.get(f"{self.base_url}/research/stream/{job_id}", stream=True)
+        event = None
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                yield event, json.loads(line[len("data: "):])
+                if event in ("completed", "failed"):
+                    return
+
+    def wait_for_completion_streaming(self, job_id: str):
+        """Print progress as it happens instead of polling, then return results"""
+        for event, data in self.stream_events(job_id):
+            if event == "synthesis_token":
+                print(data["text"], end="", flush=True)
+            elif event == "paper_analysis":
+                print(f"📄 [{data['latency']}s] {data['title']}")
+            elif event == "stage":
+                print(f"Stage: {data['stage']}")
+            elif event == "failed":
+                raise Exception(f"Job failed: {data.get('error', 'Unknown error')}")
+
+        print()
+        return self.get_results(job_id)
+
     def wait_for_completion(self, job_id: str, timeout: int = 300):
         """Wait for job to complete"""
         start_time = time.time()
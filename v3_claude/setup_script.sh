@@ -174,13 +174,16 @@ if lsof -Pi :8080 -sTCP:LISTEN -t >/dev/null ; then
     sleep 2
 fi
 
-# Start server with optimized settings
-echo "🎯 Starting LLM server on localhost:8080..."
+# Start server with optimized settings: PARALLEL slots with 4096 tokens of
+# context each (--ctx-size is shared by all slots)
+PARALLEL=4
+echo "🎯 Starting LLM server on localhost:8080 ($PARALLEL slots)..."
 "$SERVER_PATH" \
     --model "$MODEL_PATH" \
     --host 0.0.0.0 \
     --port 8080 \
-    --ctx-size 4096 \
+    --parallel $PARALLEL \
+    --ctx-size $((4096 * PARALLEL)) \
     --threads $(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 4) \
     --batch-size 512 \
     --ubatch-size 256 \
@@ -0,0 +1,64 @@
+# =============================================================================
+# bench_discovery.py - Step 1 (paper discovery) latency against stub sources
+# =============================================================================
+#
+# Runs arXiv and Semantic Scholar stubs with different latencies and compares
+# the old back-to-back search against ResearchTools.discover_papers. Concurrent
+# discovery should take max(source) instead of sum(source), and a source that
+# blows its deadline should be dropped rather than stall the job.
+#
+#     python bench_discovery.py
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from stub_servers import StubArxivServer, StubSemanticScholarServer
+
+from main import config, ResearchTools
+
+ARXIV_DELAY = 2.0
+S2_DELAY = 1.0
+
+
+def run():
+    arxiv_stub = StubArxivServer(delay=ARXIV_DELAY).start()
+    s2_stub = StubSemanticScholarServer(delay=S2_DELAY).start()
+    config.ARXIV_API_URL = f"{arxiv_stub.url}/api/query"
+    config.SEMANTIC_SCHOLAR_API_URL = f"{s2_stub.url}/graph/v1/paper/search"
+    # Rate limits would dominate a benchmark this short
+    config.ARXIV_RATE_LIMIT = 0
+    config.SEMANTIC_SCHOLAR_RATE_LIMIT = 0
+
+    tools = ResearchTools(llm_client=None, memory=None)
+    query = "transformer attention mechanisms"
+
+    start = time.perf_counter()
+    sequential = tools.search_arxiv(query, 3) + tools.search_semantic_scholar(query, 3)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent, report = tools.discover_papers(query, max_results=3)
+    concurrent_time = time.perf_counter() - start
+
+    print(f"\nSource latency: arxiv={ARXIV_DELAY}s semantic_scholar={S2_DELAY}s")
+    print(f"Sequential: {len(sequential)} papers in {sequential_time:.2f}s")
+    print(f"Concurrent: {len(concurrent)} papers in {concurrent_time:.2f}s")
+    print(f"Per-source: {report}")
+
+    # A deadline shorter than arXiv's latency drops it without stalling the job
+    config.SOURCE_DEADLINES = {"arxiv": ARXIV_DELAY / 2, "semantic_scholar": 10}
+    start = time.perf_counter()
+    partial, report = tools.discover_papers(query, max_results=3)
+    partial_time = time.perf_counter() - start
+    print(f"With arxiv deadline {ARXIV_DELAY / 2}s: {len(partial)} papers in {partial_time:.2f}s")
+    print(f"Per-source: {report}")
+
+    arxiv_stub.stop()
+    s2_stub.stop()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,107 @@
+# =============================================================================
+# bench_embeddings.py - Embedding backend throughput and recall@k parity
+# =============================================================================
+#
+# Encodes a fixed synthetic corpus (titles + abstracts, seeded) with each
+# backend from research_mate/embeddings.py and reports:
+#
+#   texts/s      corpus encoding throughput (median of --runs)
+#   recall@k     overlap of each query's top-k corpus neighbours with the
+#                reference backend's top-k (1.0 = identical rankings)
+#   cosine       mean cosine similarity to the reference vector of each text
+#
+# The first backend listed is the reference. Backends whose model files
+# cannot be loaded (no network, no local export) are skipped with a message.
+#
+#     python bench_embeddings.py [--backends sentence-transformers onnx onnx-int8]
+#                                [--papers 500] [--queries 50] [--k 10] [--threads 4]
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from bench_prompt_cache import VOCABULARY
+
+
+def synthetic_corpus(n_papers: int, n_queries: int, seed: int = 691):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n_papers):
+        corpus.append(" ".join(rng.sample(VOCABULARY, 6)).title())
+        corpus.append(" ".join(rng.choices(VOCABULARY, k=110)))
+    queries = [" ".join(rng.sample(VOCABULARY, 3)) for _ in range(n_queries)]
+    return corpus, queries
+
+
+def top_k(query_embeddings: np.ndarray, corpus_embeddings: np.ndarray, k: int) -> np.ndarray:
+    scores = query_embeddings @ corpus_embeddings.T  # vectors are normalized
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run(backends, model_name: str, n_papers: int, n_queries: int, k: int, threads, batch_size: int, runs: int):
+    from embeddings import create_backend
+
+    corpus, queries = synthetic_corpus(n_papers, n_queries)
+    print(f"corpus: {len(corpus)} texts, {len(queries)} queries, model {model_name}, "
+          f"threads {threads or 'default'}, batch {batch_size}\n")
+
+    reference = None
+    rows = []
+    for kind in backends:
+        try:
+            start = time.perf_counter()
+            backend = create_backend(kind, model_name, threads=threads, batch_size=batch_size)
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"skipping {kind}: {type(e).__name__}: {e}")
+            continue
+
+        backend.encode(corpus[:batch_size])  # warm-up
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            corpus_embeddings = backend.encode(corpus)
+            timings.append(time.perf_counter() - start)
+        query_embeddings = backend.encode(queries)
+        neighbours = top_k(query_embeddings, corpus_embeddings, k)
+
+        if reference is None:
+            reference = (kind, corpus_embeddings, neighbours)
+        _, reference_embeddings, reference_neighbours = reference
+        recall = statistics.mean(len(set(ours) & set(theirs)) / k
+                                 for ours, theirs in zip(neighbours, reference_neighbours))
+        cosine = float(np.mean(np.sum(corpus_embeddings * reference_embeddings, axis=1)))
+        rows.append((kind, load_seconds, len(corpus) / statistics.median(timings), recall, cosine))
+
+    if not rows:
+        return
+    print(f"\nreference: {reference[0]}")
+    print(f"{'backend':>21} | {'load':>6} | {'texts/s':>8} | {f'recall@{k}':>9} | {'cosine':>6}")
+    print("-" * 64)
+    for kind, load_seconds, throughput, recall, cosine in rows:
+        print(f"{kind:>21} | {load_seconds:>5.1f}s | {throughput:>8.1f} | {recall:>9.3f} | {cosine:>6.4f}")
+
+
+if __name__ == "__main__":
+    from embeddings import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS,
+                        help="backends to compare; the first is the recall reference")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="model name or local model directory")
+    parser.add_argument("--papers", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.backends, args.model, args.papers, args.queries, args.k, args.threads, args.batch_size, args.runs)
@@ -0,0 +1,78 @@
+# =============================================================================
+# bench_llm_cache.py - LLM response cache insert/lookup cost by size
+# =============================================================================
+#
+# Compares the original LocalLLMClient cache (plain dict, O(n) min() scan per
+# insert once full) against cache.LRUTTLCache at 1k, 10k and 100k entries.
+# Inserts are measured with the cache already full, so every insert evicts.
+#
+#     python bench_llm_cache.py [--ops 500]
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from cache import LRUTTLCache
+
+SIZES = [1_000, 10_000, 100_000]
+VALUE = "x" * 400  # roughly one short analysis
+
+
+class LegacyDictCache:
+    """The original LocalLLMClient caching logic, for comparison"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.cache = {}
+
+    def set(self, key, value):
+        if len(self.cache) > self.max_size:
+            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
+            del self.cache[oldest_key]
+        self.cache[key] = (value, datetime.now())
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        return entry[0] if entry else None
+
+
+def time_per_op(func, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def bench(cache, size: int, ops: int):
+    for i in range(size + 1):
+        cache.set(f"key-{i}", VALUE)
+
+    new_keys = [f"new-{i}" for i in range(ops)]
+    insert_us = time_per_op(lambda k: cache.set(k, VALUE), new_keys)
+
+    lookup_keys = [f"key-{i}" for i in range(size - ops, size)]
+    lookup_us = time_per_op(cache.get, lookup_keys)
+    return insert_us, lookup_us
+
+
+def run(ops: int):
+    print(f"{'entries':>8} | {'impl':>12} | {'insert µs/op':>13} | {'lookup µs/op':>13}")
+    print("-" * 56)
+    for size in SIZES:
+        implementations = [
+            ("legacy dict", LegacyDictCache(size)),
+            ("LRUTTLCache", LRUTTLCache(max_entries=size, ttl_seconds=24 * 3600)),
+        ]
+        for name, cache in implementations:
+            insert_us, lookup_us = bench(cache, size, ops)
+            print(f"{size:>8} | {name:>12} | {insert_us:>13.2f} | {lookup_us:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM cache microbenchmark")
+    parser.add_argument("--ops", type=int, default=500, help="timed inserts/lookups per size")
+    run(parser.parse_args().ops)
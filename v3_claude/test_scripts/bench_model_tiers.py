@@ -0,0 +1,104 @@
+# =============================================================================
+# bench_model_tiers.py - One model for every step vs small/large model tiers
+# =============================================================================
+#
+# Runs the pipeline's LLM steps for synthetic papers - per-paper analysis
+# (which returns each paper's classification in the same structured call), the
+# classify stage (a batch call only for papers whose analysis did not validate)
+# and synthesis - against two stub llama.cpp servers standing in for a small
+# (3B) and a large (8B) model; the large one is slower per request and per
+# prompt token.
+#
+#   single: every step on the large model (the original setup)
+#   tiered: Config.STEP_MODEL_TIERS - classify/analyze small, synthesize large
+#
+# Prints wall time per step and the per-tier metrics from LocalLLMClient.
+# Runs in a temporary directory so the real caches are untouched.
+#
+#     python bench_model_tiers.py [--papers 16] [--small-delay 0.15] [--large-delay 0.5]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from bench_prompt_cache import synthetic_papers
+from stub_servers import StubLlamaServer
+
+
+def run_variant(tier_urls, papers):
+    import main
+
+    client = main.LocalLLMClient(tier_urls["large"])
+    client.set_tiers(tier_urls)
+    tools = main.ResearchTools(client, memory=None)
+
+    timings = {}
+    start = time.perf_counter()
+    timed_analyses = tools.analyze_paper_batch_timed(papers)
+    timings["analyze"] = time.perf_counter() - start
+    analyses = [analysis for analysis, _, _ in timed_analyses]
+
+    # The classify stage: classifications come with the analyses, so only the
+    # papers without one cost a call
+    start = time.perf_counter()
+    tools.classify_analyzed(papers, [main.make_serializable(classification)
+                                     for _, classification, _ in timed_analyses])
+    timings["classify"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tier = main.config.STEP_MODEL_TIERS["synthesize"]
+    client.generate(main.PromptTemplates.get_synthesis_prompt("benchmark query", analyses),
+                    max_tokens=main.config.SYNTHESIS_MAX_TOKENS, temperature=0.4,
+                    slot_key="synthesis", tier=tier)
+    timings["synthesize"] = time.perf_counter() - start
+    return timings, client.tier_stats()
+
+
+def run(n_papers: int, small_delay: float, large_delay: float):
+    import main
+
+    main.config.PERSISTENT_LLM_CACHE = False
+    slots = main.config.LLM_PARALLEL_SLOTS
+    small = StubLlamaServer(delay=small_delay, model="small-3b.gguf", n_slots=slots,
+                            prompt_ms_per_token=0.2).start()
+    large = StubLlamaServer(delay=large_delay, model="large-8b.gguf", n_slots=slots,
+                            prompt_ms_per_token=0.6).start()
+    papers = synthetic_papers(n_papers)
+
+    variants = [
+        ("single", {"small": [large.url], "large": [large.url]}),
+        ("tiered", {"small": [small.url], "large": [large.url]}),
+    ]
+    for name, tier_urls in variants:
+        timings, tier_stats = run_variant(tier_urls, papers)
+        total = sum(timings.values())
+        print(f"\n== {name}: {total:.2f}s total "
+              f"({', '.join(f'{step} {seconds:.2f}s' for step, seconds in timings.items())})")
+        print(f"{'tier':>6} | {'model':>14} | {'requests':>8} | {'avg latency':>11} | "
+              f"{'output tokens':>13} | {'tokens/s':>8}")
+        print("-" * 76)
+        for tier, stats in tier_stats.items():
+            print(f"{tier:>6} | {stats['model']:>14} | {stats['requests']:>8} | "
+                  f"{stats['avg_latency_ms']:>8.1f} ms | {stats['predicted_tokens']:>13} | "
+                  f"{stats['tokens_per_s']:>8.1f}")
+
+    small.stop()
+    large.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM model tier benchmark")
+    parser.add_argument("--papers", type=int, default=16)
+    parser.add_argument("--small-delay", type=float, default=0.15,
+                        help="seconds of generation per request on the small-model stub")
+    parser.add_argument("--large-delay", type=float, default=0.5,
+                        help="seconds of generation per request on the large-model stub")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+    run(args.papers, args.small_delay, args.large_delay)
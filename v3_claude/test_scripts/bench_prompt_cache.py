@@ -0,0 +1,120 @@
+# =============================================================================
+# bench_prompt_cache.py - Prompt evaluation per paper, before/after KV reuse
+# =============================================================================
+#
+# Analyzes synthetic papers against the stub llama.cpp server, which simulates
+# per-slot KV prompt caching and reports llama.cpp-style timings.
+#
+#   before: original analysis template (paper first, instructions after), no
+#           cache_prompt / id_slot
+#   after:  PromptTemplates (shared instructions first) with cache_prompt and
+#           slot affinity
+#
+# Runs in a temporary directory so the real caches are untouched.
+#
+#     python bench_prompt_cache.py [--papers 24] [--prompt-ms-per-token 0.5]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from stub_servers import StubLlamaServer
+
+VOCABULARY = (
+    "transformer attention graph neural network diffusion reinforcement learning "
+    "language model retrieval augmented generation benchmark dataset robustness "
+    "optimization convergence theory empirical survey quantization inference"
+).split()
+
+
+def legacy_analysis_prompt(paper, focus: str = "methodology") -> str:
+    """The analysis template before the prefix-first layout"""
+    return f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+You are a research assistant analyzing academic papers. Be concise and specific.
+<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+Analyze this paper focusing on {focus}:
+
+**Title:** {paper.title}
+**Authors:** {', '.join(paper.authors[:3])}{"..." if len(paper.authors) > 3 else ""}
+**Abstract:** {paper.abstract[:800]}{"..." if len(paper.abstract) > 800 else ""}
+
+Provide:
+1. **Main Contribution** (1 sentence)
+2. **Key Method/Finding** (1-2 sentences)
+3. **Classification** (theoretical/empirical/review/survey)
+4. **Relevance Score** (1-10 with brief reason)
+
+<|eot_id|><|start_header_id|>assistant<|end_header_id|>"""
+
+
+def synthetic_papers(n: int, seed: int = 691):
+    from main import Paper
+
+    rng = random.Random(seed)
+    return [
+        Paper(title=f"{' '.join(rng.sample(VOCABULARY, 6)).title()} ({i})",
+              authors=[f"Author {i}"],
+              abstract=" ".join(rng.choices(VOCABULARY, k=110)))
+        for i in range(n)
+    ]
+
+
+def run_variant(server_url: str, papers, prompt_cache: bool, build_prompt):
+    import main
+
+    main.config.LLM_PROMPT_CACHE = prompt_cache
+    client = main.LocalLLMClient(server_url)
+    tier = main.config.STEP_MODEL_TIERS["analyze"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=main.config.LLM_PARALLEL_SLOTS) as executor:
+        list(executor.map(
+            lambda paper: client.generate(build_prompt(paper), max_tokens=main.config.ANALYSIS_MAX_TOKENS,
+                                          slot_key="analysis:methodology", tier=tier),
+            papers
+        ))
+    elapsed = time.perf_counter() - start
+    return client.tier(tier).stats(), elapsed
+
+
+def run(n_papers: int, prompt_ms_per_token: float):
+    import main
+
+    main.config.PERSISTENT_LLM_CACHE = False
+    llama = StubLlamaServer(n_slots=main.config.LLM_PARALLEL_SLOTS,
+                            prompt_ms_per_token=prompt_ms_per_token).start()
+    papers = synthetic_papers(n_papers)
+
+    variants = [
+        ("before", False, legacy_analysis_prompt),
+        ("after", True, lambda paper: main.PromptTemplates.get_analysis_prompt(paper, "methodology")),
+    ]
+    print(f"{'variant':>7} | {'prompt tokens/paper':>19} | {'cached/paper':>12} | "
+          f"{'prompt ms/paper':>15} | {'wall time':>9}")
+    print("-" * 76)
+    for name, prompt_cache, build_prompt in variants:
+        stats, elapsed = run_variant(llama.url, papers, prompt_cache, build_prompt)
+        requests_made = stats["requests"] or 1
+        print(f"{name:>7} | {stats['prompt_tokens'] / requests_made:>19.1f} | "
+              f"{stats['cached_tokens'] / requests_made:>12.1f} | "
+              f"{stats['avg_prompt_ms']:>15.1f} | {elapsed:>8.2f}s")
+    llama.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="llama.cpp prompt cache benchmark")
+    parser.add_argument("--papers", type=int, default=24)
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.5,
+                        help="simulated prompt evaluation cost on the stub server")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+    run(args.papers, args.prompt_ms_per_token)
@@ -0,0 +1,160 @@
+# =============================================================================
+# bench_sqlite_pool.py - Connect-per-call SQLite vs persistence.SQLiteDatabase
+# =============================================================================
+#
+# Simulates the API's database traffic: N threads doing job status lookups and
+# query-cache lookups, with ~10% writes (hit counters and new jobs). Runs it
+# once with the original pattern (sqlite3.connect per statement, rollback
+# journal, commit per write) and once through SQLiteDatabase (per-thread
+# connections, WAL, deferred hit-count writes). Runs in a temporary directory.
+#
+#     python bench_sqlite_pool.py [--threads 1 8 32] [--seconds 3]
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+from persistence import SQLiteDatabase
+
+N_JOBS = 2_000
+N_QUERIES = 500
+WRITE_RATIO = 0.1
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS research_jobs (
+           job_id TEXT PRIMARY KEY, query TEXT, status TEXT, results TEXT,
+           created_at TIMESTAMP)""",
+    """CREATE TABLE IF NOT EXISTS query_cache (
+           query_hash TEXT PRIMARY KEY, query TEXT, results TEXT,
+           created_at TIMESTAMP, hit_count INTEGER DEFAULT 0)""",
+]
+
+
+def seed(path: str):
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    results = json.dumps({"papers": [{"title": "x" * 80, "abstract": "y" * 800}] * 5})
+    conn.executemany(
+        "INSERT INTO research_jobs VALUES (?, ?, 'completed', ?, datetime('now'))",
+        [(f"job-{i}", f"query {i}", results) for i in range(N_JOBS)]
+    )
+    conn.executemany(
+        "INSERT INTO query_cache VALUES (?, ?, ?, datetime('now'), 0)",
+        [(f"hash-{i}", f"query {i}", results) for i in range(N_QUERIES)]
+    )
+    conn.commit()
+    conn.close()
+
+
+class ConnectPerCall:
+    """The original MemoryManager access pattern"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self, sql, params):
+        conn = sqlite3.connect(self.path)
+        row = conn.execute(sql, params).fetchone()
+        conn.close()
+        return row
+
+    def write(self, sql, params):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def counter(self, sql, params):
+        self.write(sql, params)
+
+    def close(self):
+        pass
+
+
+class Pooled:
+    def __init__(self, path: str):
+        self.db = SQLiteDatabase(path, busy_timeout=30)
+
+    def read(self, sql, params):
+        return self.db.query_one(sql, params)
+
+    def write(self, sql, params):
+        self.db.execute(sql, params)
+
+    def counter(self, sql, params):
+        self.db.defer(sql, params)
+
+    def close(self):
+        self.db.close()
+
+
+def worker(backend, deadline: float, counts: list, index: int, seed_value: int):
+    rng = random.Random(seed_value)
+    ops = 0
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < WRITE_RATIO:
+            backend.write(
+                "INSERT INTO research_jobs VALUES (?, 'new', 'queued', NULL, datetime('now'))",
+                (str(uuid.uuid4()),)
+            )
+        elif roll < 0.55:
+            backend.read("SELECT status, results FROM research_jobs WHERE job_id = ?",
+                         (f"job-{rng.randrange(N_JOBS)}",))
+        else:
+            query_hash = f"hash-{rng.randrange(N_QUERIES)}"
+            if backend.read("SELECT results, created_at FROM query_cache WHERE query_hash = ?",
+                            (query_hash,)):
+                backend.counter("UPDATE query_cache SET hit_count = hit_count + 1 WHERE query_hash = ?",
+                                (query_hash,))
+        ops += 1
+    counts[index] = ops
+
+
+def bench(backend_cls, threads: int, seconds: float) -> float:
+    path = f"{backend_cls.__name__}_{threads}_{uuid.uuid4().hex[:6]}.db"
+    seed(path)
+    backend = backend_cls(path)
+
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(backend, deadline, counts, i, i))
+            for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return sum(counts) / elapsed
+
+
+def run(thread_counts, seconds: float):
+    print(f"{'threads':>7} | {'connect per call':>17} | {'SQLiteDatabase':>15} | {'speedup':>8}")
+    print("-" * 58)
+    for threads in thread_counts:
+        before = bench(ConnectPerCall, threads, seconds)
+        after = bench(Pooled, threads, seconds)
+        print(f"{threads:>7} | {before:>11.0f} ops/s | {after:>9.0f} ops/s | {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite access pattern benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each run")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+    run(args.threads, args.seconds)
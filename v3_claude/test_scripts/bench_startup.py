@@ -0,0 +1,100 @@
+# =============================================================================
+# bench_startup.py - Import time and time-to-first-response, eager vs lazy
+# =============================================================================
+#
+# For each mode (RESEARCHMATE_LAZY_STARTUP=0 / 1) measures, in fresh processes:
+#
+#   import main      wall time of `import main` (what --reload pays per change)
+#   first response   uvicorn launch until GET /health/live answers
+#   ready            uvicorn launch until GET /health/ready returns 200
+#
+# A stub llama.cpp server stands in for the LLM so readiness can be reached.
+# Runs in a temporary directory so the real databases are untouched.
+#
+#     python bench_startup.py [--runs 3] [--timeout 180]
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from stub_servers import StubLlamaServer
+
+APP_DIR = Path(__file__).resolve().parent.parent / "research_mate"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import(env) -> float:
+    code = ("import sys, time; sys.path.insert(0, sys.argv[1]); start = time.perf_counter(); "
+            "import main; print(time.perf_counter() - start)")
+    output = subprocess.run([sys.executable, "-c", code, str(APP_DIR)], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, start: float, deadline: float, status: int = 200) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == status:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.02)
+    return float("nan")
+
+
+def time_server(env, timeout: float):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(APP_DIR), "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        first_response = wait_for(f"{base}/health/live", start, deadline)
+        ready = wait_for(f"{base}/health/ready", start, deadline)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return first_response, ready
+
+
+def run(runs: int, timeout: float):
+    llama = StubLlamaServer().start()
+    print(f"{'mode':>5} | {'import main':>11} | {'first response':>14} | {'ready':>7}")
+    print("-" * 48)
+    for mode, lazy in (("eager", "0"), ("lazy", "1")):
+        env = {**os.environ, "RESEARCHMATE_LAZY_STARTUP": lazy, "LLAMA_SERVER_URLS": llama.url}
+        imports, first, ready = [], [], []
+        for _ in range(runs):
+            os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+            imports.append(time_import(env))
+            first_response, ready_after = time_server(env, timeout)
+            first.append(first_response)
+            ready.append(ready_after)
+        print(f"{mode:>5} | {statistics.median(imports):>10.2f}s | {statistics.median(first):>13.2f}s | "
+              f"{statistics.median(ready):>6.2f}s")
+    llama.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ResearchMate startup benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=180.0, help="seconds to wait for readiness")
+    args = parser.parse_args()
+
+    run(args.runs, args.timeout)
@@ -0,0 +1,85 @@
+# =============================================================================
+# bench_store_papers.py - Per-paper store_paper vs bulk store_papers
+# =============================================================================
+#
+# Stores 6, 100 and 10k synthetic papers into fresh Chroma collections, once
+# with a store_paper loop (2 encodes + 1 query + 1 add per paper) and once with
+# MemoryManager.store_papers (1 batched encode, 1 multi-query, 1 add).
+# Runs in a temporary directory so the real databases are untouched.
+#
+#     python bench_store_papers.py [--sizes 6 100 10000] [--max-serial 10000]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+VOCABULARY = (
+    "transformer attention graph neural network diffusion reinforcement learning "
+    "language model retrieval augmented generation benchmark dataset robustness "
+    "optimization convergence theory empirical survey quantization inference "
+    "latency sparse mixture experts contrastive representation vision multimodal"
+).split()
+
+
+def synthetic_papers(n: int, seed: int = 691):
+    from main import Paper
+
+    rng = random.Random(seed)
+    papers = []
+    for i in range(n):
+        title = f"{' '.join(rng.sample(VOCABULARY, 6)).title()} ({i})"
+        abstract = " ".join(rng.choices(VOCABULARY, k=120)) + f" paper {i}."
+        papers.append(Paper(title=title, authors=[f"Author {i}"], abstract=abstract,
+                            venue="arXiv", published="2024-01-01"))
+    return papers
+
+
+def fresh_memory(name: str):
+    from main import MemoryManager, config
+
+    # Separate identity index per run, so nothing is resolved from a previous one
+    config.DATABASE_PATH = f"{name}.db"
+    memory = MemoryManager()
+    memory.papers_collection = memory.chroma_client.get_or_create_collection(name)
+    return memory
+
+
+def run(sizes, max_serial: int):
+    print(f"{'papers':>7} | {'store_paper loop':>17} | {'store_papers':>13} | {'speedup':>8}")
+    print("-" * 56)
+    for n in sizes:
+        papers = synthetic_papers(n)
+
+        serial_time = None
+        if n <= max_serial:
+            memory = fresh_memory(f"serial_{n}")
+            start = time.perf_counter()
+            for paper in papers:
+                memory.store_paper(paper)
+            serial_time = time.perf_counter() - start
+
+        memory = fresh_memory(f"bulk_{n}")
+        start = time.perf_counter()
+        memory.store_papers(papers)
+        bulk_time = time.perf_counter() - start
+
+        serial = f"{serial_time:16.2f}s" if serial_time is not None else f"{'skipped':>17}"
+        speedup = f"{serial_time / bulk_time:7.1f}x" if serial_time is not None else f"{'-':>8}"
+        print(f"{n:>7} | {serial} | {bulk_time:12.2f}s | {speedup}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk paper storage benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 100, 10_000])
+    parser.add_argument("--max-serial", type=int, default=10_000,
+                        help="skip the per-paper loop above this many papers")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+    run(args.sizes, args.max_serial)
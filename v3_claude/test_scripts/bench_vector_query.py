@@ -0,0 +1,129 @@
+# =============================================================================
+# bench_vector_query.py - search_papers latency versus collection size
+# =============================================================================
+#
+# Grows one Chroma papers collection with synthetic unit vectors (384 dims,
+# like all-MiniLM-L6-v2) and realistic filter metadata, and at each size
+# measures MemoryManager.search_papers (median ms over --queries):
+#
+#   full         top 10 with abstract, metadata and decoded authors
+#   ids only     top 10 projected to id + similarity (include=())
+#   filtered     top 10 with year range + venue pushed down as a Chroma `where`
+#   page 5       results 41-50 through a search_papers_page cursor
+#   post-filter  the old way: unfiltered top LIBRARY_CANDIDATES, filtered in
+#                Python - also reports how many of the 10 wanted results survive
+#
+# Query embeddings are random too (the encoder is not what is measured).
+# Runs in a temporary directory so the real databases are untouched.
+#
+#     python bench_vector_query.py [--sizes 1000 100000 1000000] [--queries 20]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+DIMENSION = 384
+VENUES = ["NeurIPS", "ICML", "ICLR", "ACL", "EMNLP", "CVPR", "KDD", "arXiv"]
+FILTERS = {"venue": "NeurIPS", "year_from": 2018, "year_to": 2020}
+
+
+class RandomQueryEncoder:
+    """Stands in for the embedding model: a fixed random unit vector per text"""
+
+    def encode(self, text, **kwargs):
+        rng = np.random.default_rng(abs(hash(text)) % 2 ** 32)
+        vector = rng.standard_normal(DIMENSION).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+def add_papers(memory, start: int, stop: int, seed: int = 691):
+    from main import Paper
+
+    rng = random.Random(seed + start)
+    vector_rng = np.random.default_rng(seed + start)
+    batch_size = memory.chroma_client.get_max_batch_size()
+    for offset in range(0, stop - start, batch_size):
+        ids = range(start + offset, min(stop, start + offset + batch_size))
+        vectors = vector_rng.standard_normal((len(ids), DIMENSION)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        papers = [Paper(title=f"Synthetic paper {i}", authors=[f"Author {i}", f"Author {i + 1}"],
+                        abstract=f"Synthetic abstract {i}", published=f"{rng.randint(2000, 2024)}-01-01",
+                        venue=rng.choice(VENUES), citation_count=int(rng.expovariate(1 / 50)))
+                  for i in ids]
+        memory.papers_collection.add(
+            ids=[f"paper-{i}" for i in ids],
+            embeddings=vectors,
+            documents=[paper.abstract for paper in papers],
+            metadatas=[memory._paper_metadata(paper) for paper in papers]
+        )
+
+
+def median_ms(func, queries) -> float:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def post_filter(memory, query, filters):
+    import main
+
+    hits = memory.search_papers(query, main.config.LIBRARY_CANDIDATES)
+    return [hit for hit in hits
+            if hit["venue"].lower() == filters.venue.lower() and hit["year"] is not None
+            and filters.year_from <= hit["year"] <= filters.year_to][:10]
+
+
+def run(sizes, n_queries: int):
+    import main
+
+    memory = main.MemoryManager()
+    memory.components["embedding_model"].set(RandomQueryEncoder())
+    filters = main.LibraryFilters(**FILTERS)
+    queries = [f"benchmark query {i}" for i in range(n_queries)]
+
+    def page_5(query):
+        cursor = main.encode_cursor(40, main.search_scope(query, None, "vector"))
+        memory.search_papers_page(query, 10, include=(), cursor=cursor)
+
+    print(f"filter: {FILTERS}; post-filter keeps the top {main.config.LIBRARY_CANDIDATES} unfiltered results\n")
+    print(f"{'papers':>9} | {'insert':>7} | {'full':>8} | {'ids only':>8} | {'filtered':>8} | "
+          f"{'page 5':>8} | {'post-filter':>11} | {'post-filter hits':>16}")
+    print("-" * 98)
+    stored = 0
+    for size in sorted(sizes):
+        start = time.perf_counter()
+        add_papers(memory, stored, size)
+        insert_seconds = time.perf_counter() - start
+        stored = size
+
+        memory.search_papers(queries[0])  # warm-up
+        full = median_ms(lambda query: memory.search_papers(query, 10), queries)
+        ids_only = median_ms(lambda query: memory.search_papers(query, 10, include=()), queries)
+        filtered = median_ms(lambda query: memory.search_papers(query, 10, filters, include=()), queries)
+        paged = median_ms(page_5, queries)
+        post = median_ms(lambda query: post_filter(memory, query, filters), queries)
+        survivors = statistics.mean(len(post_filter(memory, query, filters)) for query in queries)
+        print(f"{size:>9} | {insert_seconds:>6.1f}s | {full:>5.1f} ms | {ids_only:>5.1f} ms | "
+              f"{filtered:>5.1f} ms | {paged:>5.1f} ms | {post:>8.1f} ms | {survivors:>13.1f}/10")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector query latency vs collection size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="researchmate_bench_"))
+    run(args.sizes, args.queries)
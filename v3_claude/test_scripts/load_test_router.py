@@ -0,0 +1,82 @@
+# =============================================================================
+# load_test_router.py - LLM router load balancing and failover
+# =============================================================================
+#
+# Starts several stub llama.cpp servers (one slower than the rest) and sends
+# concurrent /completion requests through common/llm_router.LLMRouter:
+#
+#   1. all servers up      - requests spread by least outstanding requests
+#   2. one server 503s     - its circuit opens, traffic fails over
+#   3. one server stopped  - health checks take it out of rotation
+#   4. failing server back - half-open trial closes the circuit again
+#
+#     python load_test_router.py [--servers 3] [--requests 60] [--concurrency 8]
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+
+from llm_router import LLMRouter
+from stub_servers import StubLlamaServer
+
+
+def send_batch(router: LLMRouter, n_requests: int, concurrency: int):
+    def one(i):
+        try:
+            router.post("/completion", json={"prompt": f"request {i}", "n_predict": 8}, timeout=10).json()
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(n_requests)))
+    return sum(results), time.perf_counter() - start
+
+
+def report(title: str, router: LLMRouter, servers, ok: int, n_requests: int, elapsed: float, before):
+    print(f"\n{title}: {ok}/{n_requests} succeeded in {elapsed:.2f}s")
+    for server, endpoint, count in zip(servers, router.stats(), before):
+        print(f"  {endpoint['url']}  delay={server.delay:.2f}s  served={server.request_count - count:>3}  "
+              f"circuit={endpoint['circuit']:<9} healthy={endpoint['healthy']}")
+
+
+def run(n_servers: int, n_requests: int, concurrency: int):
+    servers = [StubLlamaServer(delay=0.05).start() for _ in range(n_servers)]
+    servers[-1].delay = 0.25  # one slow box
+    router = LLMRouter([s.url for s in servers], failure_threshold=3, reset_timeout=1.0, health_interval=0)
+
+    def phase(title):
+        before = [s.request_count for s in servers]
+        ok, elapsed = send_batch(router, n_requests, concurrency)
+        report(title, router, servers, ok, n_requests, elapsed, before)
+
+    phase("1. all servers up")
+
+    servers[0].fail_status = 503
+    phase("2. first server returning 503")
+
+    servers[1].stop()
+    router.check_health()
+    phase("3. second server stopped (health check)")
+
+    servers[0].fail_status = None
+    time.sleep(router.reset_timeout)
+    router.check_health()
+    phase("4. first server recovered")
+
+    for server in (servers[0], *servers[2:]):
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM router load/failover test")
+    parser.add_argument("--servers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run(args.servers, args.requests, args.concurrency)
@@ -0,0 +1,118 @@
+# =============================================================================
+# load_test_status.py - Status endpoint latency while research jobs run
+# =============================================================================
+#
+# Starts 10 research jobs and, while they are in flight, hammers
+# /research/status/{job_id} and / from several threads. Reports p50/p95/p99
+# latency; with job stages running on the executor these stay in the
+# low-millisecond range instead of stalling for whole pipeline stages.
+#
+# By default everything runs in-process against stub servers:
+#     python load_test_status.py
+# or point it at an already running ResearchMate instance:
+#     python load_test_status.py --base-url http://localhost:8000
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "research_mate"))
+
+
+def start_in_process_server(port: int, llm_delay: float) -> str:
+    """Run ResearchMate under uvicorn on a thread, wired to stub servers"""
+    import uvicorn
+    from stub_servers import StubArxivServer, StubLlamaServer, StubSemanticScholarServer
+    import main
+
+    llama = StubLlamaServer(delay=llm_delay).start()
+    arxiv_stub = StubArxivServer(delay=0.5).start()
+    s2_stub = StubSemanticScholarServer(delay=0.5).start()
+
+    main.config.ARXIV_API_URL = f"{arxiv_stub.url}/api/query"
+    main.config.SEMANTIC_SCHOLAR_API_URL = f"{s2_stub.url}/graph/v1/paper/search"
+    main.config.ARXIV_RATE_LIMIT = 0
+    main.config.SEMANTIC_SCHOLAR_RATE_LIMIT = 0
+    main.agent.llm.set_endpoints([llama.url])
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(base_url: str, n_jobs: int, n_pollers: int, timeout: float):
+    run_id = int(time.time())
+    job_ids = []
+    for i in range(n_jobs):
+        response = requests.post(f"{base_url}/research/query",
+                                 json={"query": f"load test {run_id} topic {i}"})
+        job_ids.append(response.json()["job_id"])
+    print(f"🚀 Started {len(job_ids)} jobs")
+
+    latencies = {"status": [], "root": []}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def poll(worker: int):
+        session = requests.Session()
+        i = worker
+        while not done.is_set():
+            job_id = job_ids[i % len(job_ids)]
+            i += 1
+            for name, url in (("status", f"{base_url}/research/status/{job_id}"), ("root", f"{base_url}/")):
+                start = time.perf_counter()
+                session.get(url, timeout=30)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies[name].append(elapsed)
+
+    pollers = [threading.Thread(target=poll, args=(w,), daemon=True) for w in range(n_pollers)]
+    for thread in pollers:
+        thread.start()
+
+    start = time.time()
+    statuses = {}
+    while time.time() - start < timeout:
+        statuses = {job_id: requests.get(f"{base_url}/research/status/{job_id}").json()["status"]
+                    for job_id in job_ids}
+        if all(status in ("completed", "failed") for status in statuses.values()):
+            break
+        time.sleep(0.5)
+    done.set()
+    for thread in pollers:
+        thread.join()
+
+    print(f"⏱️ Jobs finished in {time.time() - start:.1f}s: "
+          f"{sum(s == 'completed' for s in statuses.values())} completed, "
+          f"{sum(s == 'failed' for s in statuses.values())} failed")
+    for name, samples in latencies.items():
+        print(f"{name:>7}: n={len(samples):5d}  p50={statistics.median(samples):7.1f}ms  "
+              f"p95={percentile(samples, 95):7.1f}ms  p99={percentile(samples, 99):7.1f}ms  "
+              f"max={max(samples):7.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Status endpoint latency under concurrent jobs")
+    parser.add_argument("--base-url", help="existing ResearchMate server (default: in-process with stubs)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--llm-delay", type=float, default=1.0, help="stub LLM seconds per completion")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    url = args.base_url or start_in_process_server(args.port, args.llm_delay)
+    run(url, args.jobs, args.pollers, args.timeout)
@@ -0,0 +1,339 @@
+# =============================================================================
+# stub_servers.py - Local stand-ins for llama.cpp, arXiv and Semantic Scholar
+# =============================================================================
+#
+# Lets the ResearchMate pipeline be exercised (and benchmarked) without network
+# access or a GPU. Each stub runs a ThreadingHTTPServer on a background thread
+# with a configurable artificial latency.
+#
+# Usage from a script:
+#     llama = StubLlamaServer(delay=0.5).start()
+#     agent.llm.set_endpoints([llama.url])
+#
+# Usage from a shell (runs until Ctrl+C):
+#     python stub_servers.py --llama 8080 --arxiv 8090 --s2 8091
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+
+class StubServer:
+    """Base class: a threaded HTTP server with a fixed per-request delay"""
+
+    def __init__(self, port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.fail_status = None  # set to e.g. 503 to make every request fail
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, obj, status: int = 200):
+                body = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_json(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                stub._count()
+                if stub.fail_status:
+                    return self.send_json({"error": "stub failure"}, status=stub.fail_status)
+                stub.handle_get(self)
+
+            def do_POST(self):
+                stub._count()
+                if stub.fail_status:
+                    return self.send_json({"error": "stub failure"}, status=stub.fail_status)
+                stub.handle_post(self)
+
+        return Handler
+
+    def _count(self):
+        with self._lock:
+            self.request_count += 1
+
+    def handle_get(self, handler):
+        handler.send_json({"error": "not found"}, status=404)
+
+    def handle_post(self, handler):
+        handler.send_json({"error": "not found"}, status=404)
+
+
+def sample_from_schema(schema: dict, defs: dict = None):
+    """Smallest value conforming to a (Pydantic-style) JSON schema, like a
+    grammar-constrained completion"""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[1]], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return sample_from_schema(schema["anyOf"][0], defs)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: sample_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [sample_from_schema(schema.get("items", {}), defs) for _ in range(schema.get("minItems", 1))]
+    if kind == "integer":
+        return schema.get("minimum", 1)
+    if kind == "number":
+        return schema.get("maximum", schema.get("minimum", 0.5))
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return "stub text"[:schema.get("maxLength", 9)]
+
+
+class StubLlamaServer(StubServer):
+    """Minimal llama.cpp server: /health, /props, /tokenize and /completion.
+
+    A ``json_schema`` in the request is answered with the smallest conforming
+    JSON value.
+
+    Simulates per-slot KV prompt caching: with ``cache_prompt`` set, only the
+    tokens after the prefix shared with the slot's previous prompt are evaluated
+    (``id_slot`` picks the slot; otherwise slots are used round-robin). Like
+    llama.cpp, an ``id_slot`` outside the ``n_slots`` reported as ``total_slots``
+    in /props is rejected with HTTP 400. Prompt evaluation costs
+    ``prompt_ms_per_token`` and is reported in ``timings``.
+    """
+
+    def __init__(self, port: int = 0, delay: float = 0.0, model: str = "stub-model.gguf",
+                 n_slots: int = 4, prompt_ms_per_token: float = 0.0):
+        super().__init__(port, delay)
+        self.model = model
+        self.n_slots = n_slots
+        self.prompt_ms_per_token = prompt_ms_per_token
+        self.slot_tokens = [[] for _ in range(n_slots)]
+        self._next_slot = 0
+
+    def handle_get(self, handler):
+        if handler.path.startswith("/health"):
+            handler.send_json({"status": "ok"})
+        elif handler.path.startswith("/props"):
+            handler.send_json({"model_path": f"/models/{self.model}", "total_slots": self.n_slots})
+        else:
+            super().handle_get(handler)
+
+    @staticmethod
+    def tokenize(text: str):
+        """Rough BPE stand-in: words split into pieces of at most 4 characters"""
+        return [hash(piece) % 32000
+                for word in re.findall(r"\w+|[^\w\s]", text)
+                for piece in (word[i:i + 4] for i in range(0, len(word), 4))]
+
+    def handle_post(self, handler):
+        if handler.path.startswith("/tokenize"):
+            return handler.send_json({"tokens": self.tokenize(handler.read_json().get("content", ""))})
+        if not handler.path.startswith("/completion"):
+            return super().handle_post(handler)
+
+        payload = handler.read_json()
+        content = f"Stub completion for a {len(payload.get('prompt', ''))}-char prompt"
+        if payload.get("json_schema"):
+            content = json.dumps(sample_from_schema(payload["json_schema"]))
+        try:
+            timings = self.evaluate_prompt(payload)
+        except ValueError as e:
+            return handler.send_json({"error": {"code": 400, "message": str(e)}}, status=400)
+        # Generation time is the configured delay
+        timings["timings"].update(predicted_n=len(self.tokenize(content)), predicted_ms=self.delay * 1000)
+
+        if not payload.get("stream"):
+            time.sleep(self.delay)
+            handler.send_json({"content": content, "stop": True, **timings})
+            return
+
+        # llama.cpp streaming format: one chunked "data: {json}" event per token
+        tokens = [f" {word}" for word in content.split()]
+        handler.protocol_version = "HTTP/1.1"
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+
+        def write_chunk(data: bytes):
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        for token in tokens:
+            time.sleep(self.delay / len(tokens))
+            write_chunk(f"data: {json.dumps({'content': token, 'stop': False})}\n\n".encode())
+        write_chunk(f"data: {json.dumps({'content': '', 'stop': True, **timings})}\n\n".encode())
+        write_chunk(b"")
+
+
+    def evaluate_prompt(self, payload) -> dict:
+        """Charge prompt evaluation for the tokens not already in the slot's cache.
+
+        Raises ValueError for an ``id_slot`` the server does not have.
+        """
+        tokens = self.tokenize(payload.get("prompt", ""))
+        with self._lock:
+            slot = payload.get("id_slot", -1)
+            if slot >= self.n_slots or slot < -1:
+                raise ValueError(f"Invalid id_slot {slot} (server has {self.n_slots} slots)")
+            if slot == -1:
+                slot = self._next_slot
+                self._next_slot = (self._next_slot + 1) % self.n_slots
+
+            cached = 0
+            if payload.get("cache_prompt"):
+                for previous, current in zip(self.slot_tokens[slot], tokens):
+                    if previous != current:
+                        break
+                    cached += 1
+            self.slot_tokens[slot] = tokens
+
+        prompt_n = len(tokens) - cached
+        prompt_ms = prompt_n * self.prompt_ms_per_token
+        time.sleep(prompt_ms / 1000)
+        return {
+            "id_slot": slot,
+            "tokens_cached": cached,
+            "timings": {"prompt_n": prompt_n, "prompt_ms": prompt_ms}
+        }
+
+
+class StubArxivServer(StubServer):
+    """Serves an arXiv-style Atom feed for any /api/query request"""
+
+    def __init__(self, port: int = 0, delay: float = 0.0, n_papers: int = 3):
+        super().__init__(port, delay)
+        self.n_papers = n_papers
+
+    def handle_get(self, handler):
+        if not handler.path.startswith("/api/query"):
+            return super().handle_get(handler)
+
+        params = parse_qs(urlparse(handler.path).query)
+        query = params.get("search_query", [""])[0]
+        start = int(params.get("start", ["0"])[0])
+        time.sleep(self.delay)
+
+        entries = []
+        for i in range(start, self.n_papers):
+            entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/2401.{i:05d}v1</id>
+    <updated>2024-01-0{i % 9 + 1}T00:00:00Z</updated>
+    <published>2024-01-0{i % 9 + 1}T00:00:00Z</published>
+    <title>Stub arXiv paper {i} on {escape(query)}</title>
+    <summary>An abstract about {escape(query)} describing method {i} and its empirical results.</summary>
+    <author><name>Author {i}</name></author>
+    <link href="http://arxiv.org/abs/2401.{i:05d}v1" rel="alternate" type="text/html"/>
+    <arxiv:primary_category term="cs.CL"/>
+    <category term="cs.CL"/>
+  </entry>""")
+
+        body = f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"
+      xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <opensearch:totalResults>{self.n_papers}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{self.n_papers}</opensearch:itemsPerPage>{"".join(entries)}
+</feed>""".encode()
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/atom+xml")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class StubSemanticScholarServer(StubServer):
+    """Serves Semantic Scholar /graph/v1/paper/search responses"""
+
+    def __init__(self, port: int = 0, delay: float = 0.0, n_papers: int = 3):
+        super().__init__(port, delay)
+        self.n_papers = n_papers
+
+    def handle_get(self, handler):
+        if not handler.path.startswith("/graph/v1/paper/search"):
+            return super().handle_get(handler)
+
+        params = parse_qs(urlparse(handler.path).query)
+        query = params.get("query", [""])[0]
+        limit = int(params.get("limit", [str(self.n_papers)])[0])
+        time.sleep(self.delay)
+
+        handler.send_json({"data": [
+            {
+                "title": f"Stub Semantic Scholar paper {i} on {query}",
+                "authors": [{"name": f"Scholar {i}"}],
+                "abstract": f"A study of {query} using approach {i}.",
+                "url": f"https://www.semanticscholar.org/paper/stub{i}",
+                "venue": "StubConf",
+                "year": 2020 + i,
+                "citationCount": 10 * i
+            }
+            for i in range(min(limit, self.n_papers))
+        ]})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ResearchMate stub servers")
+    parser.add_argument("--llama", type=int, help="port for the llama.cpp stub")
+    parser.add_argument("--arxiv", type=int, help="port for the arXiv stub")
+    parser.add_argument("--s2", type=int, help="port for the Semantic Scholar stub")
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds of latency per request")
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.0,
+                        help="simulated llama.cpp prompt evaluation cost")
+    parser.add_argument("--model", default="stub-model.gguf", help="model name reported by the llama.cpp stub")
+    args = parser.parse_args()
+
+    servers = []
+    if args.llama:
+        servers.append(StubLlamaServer(args.llama, args.delay, model=args.model,
+                                       prompt_ms_per_token=args.prompt_ms_per_token).start())
+    if args.arxiv:
+        servers.append(StubArxivServer(args.arxiv, args.delay).start())
+    if args.s2:
+        servers.append(StubSemanticScholarServer(args.s2, args.delay).start())
+
+    for server in servers:
+        print(f"🧪 {type(server).__name__} listening on {server.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()